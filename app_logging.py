@@ -0,0 +1,89 @@
+import os
+import sys
+import queue
+import threading
+import logging
+import tempfile
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+LOGGER_NAME = "bird_sound_examiner"
+LOG_FILE_NAME = 'bird_sound_examiner_log.txt'
+ERROR_LOG_FILE_NAME = 'bird_sound_examiner_error_log.txt'
+LOG_LEVEL_ENV = 'BIRD_SOUND_EXAMINER_LOG_LEVEL'
+
+
+class AppLogging:
+    # Callers only put records on a queue; a QueueListener thread does the file
+    # I/O and rotation, so the Tk event loop never waits on the disk.
+    def __init__(self, log_dir=None, level=None, max_bytes=5 * 1024 ** 2, backup_count=3):
+        log_dir = log_dir or tempfile.gettempdir()
+        self.log_file = os.path.join(log_dir, LOG_FILE_NAME)
+        self.error_log_file = os.path.join(log_dir, ERROR_LOG_FILE_NAME)
+
+        # Per-file DEBUG lines are off unless explicitly asked for
+        level = level or os.environ.get(LOG_LEVEL_ENV, 'INFO')
+        if isinstance(level, str):
+            level = level.upper()
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(level)
+        self.logger.propagate = False
+
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
+        handlers = []
+        for path, handler_level in ((self.log_file, logging.DEBUG), (self.error_log_file, logging.ERROR)):
+            try:
+                handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+            except OSError as e:
+                print(f"Warning: Unable to create or write to log file {path}. Error: {e}")
+                continue
+            handler.setLevel(handler_level)
+            handler.setFormatter(formatter)
+            handlers.append(handler)
+        if not handlers:
+            self.log_file = None
+
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.logger.handlers = [QueueHandler(self.queue)]
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            for handler in self.logger.handlers:
+                self.logger.removeHandler(handler)
+
+
+# Installed as sys.stdout so stray print() calls (from this app or its
+# libraries) reach the same queued log. The windowed build has no console,
+# so sys.stdout may be None; those lines then only go to the log.
+class LoggingPrint:
+    def __init__(self, logger, level=logging.INFO):
+        self.terminal = sys.stdout
+        self.logger = logger
+        self.level = level
+        # print() writes its arguments, separators and end one call at a time;
+        # text is held until a newline so each printed line is one record
+        self.buffer = ""
+        self.lock = threading.Lock()
+
+    def write(self, message):
+        if self.terminal is not None:
+            self.terminal.write(message)
+        with self.lock:
+            self.buffer += message
+            *lines, self.buffer = self.buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                self.logger.log(self.level, line)
+        return len(message)
+
+    def flush(self):
+        if self.terminal is not None:
+            self.terminal.flush()
+        with self.lock:
+            line, self.buffer = self.buffer, ""
+        if line.strip():
+            self.logger.log(self.level, line)
@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import weakref
+import threading
+
+import numpy as np
+
+
+# Largest decoded clip accepted; a 3 s clip is about 0.5 MB
+MAX_CLIP_BYTES = 64 * 1024 ** 2
+# All decoded audio alive in the process at once (prefetched clips, grid
+# pages, the clip playing, triage and fingerprint batches)
+DEFAULT_BUDGET_BYTES = 512 * 1024 ** 2
+BLOCK_FRAMES = 65536
+WAIT_SECONDS = 10.0
+
+
+class ClipTooLarge(ValueError):
+    pass
+
+
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+def process_memory_bytes():
+    # Current resident memory of the whole process, or None where it can't be
+    # read. Elsewhere only the peak (ru_maxrss) is cheap, and a peak never
+    # drops, so it must not be mistaken for the current figure.
+    try:
+        if sys.platform.startswith('linux'):
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        if sys.platform == 'win32':
+            return _windows_working_set()
+    except (OSError, ValueError, AttributeError, ImportError):
+        pass
+    return None
+
+
+def _windows_working_set():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    kernel32 = ctypes.WinDLL('kernel32')
+    psapi = ctypes.WinDLL('psapi')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+# Accounts for every decoded buffer from reservation until the array is
+# garbage collected. A background thread asking for more than the budget has
+# left (or while the process is over its ceiling) waits for buffers to be
+# freed, and gives up with MemoryBudgetExceeded after WAIT_SECONDS. The Tk
+# thread never waits, and a request is always granted when nothing else is
+# held, so the clip on screen can always be decoded. The ceiling only applies
+# where process_memory_bytes can read the current figure (Linux, Windows).
+class DecodeBudget:
+    def __init__(self, limit_bytes=DEFAULT_BUDGET_BYTES, process_limit_bytes=None, wait_seconds=WAIT_SECONDS):
+        self.limit_bytes = limit_bytes
+        self.process_limit_bytes = process_limit_bytes
+        self.wait_seconds = wait_seconds
+        self.used = 0
+        self.peak = 0
+        # Reentrant: a finalizer may release while this thread holds the lock
+        self.condition = threading.Condition(threading.RLock())
+
+    def configure(self, limit_bytes=None, process_limit_bytes=None):
+        with self.condition:
+            if limit_bytes is not None:
+                self.limit_bytes = limit_bytes
+            self.process_limit_bytes = process_limit_bytes
+            self.condition.notify_all()
+
+    def _fits(self, nbytes):
+        if self.used == 0:
+            return True
+        if self.used + nbytes > self.limit_bytes:
+            return False
+        if self.process_limit_bytes is not None:
+            process_bytes = process_memory_bytes()
+            if process_bytes is not None and process_bytes + nbytes > self.process_limit_bytes:
+                return False
+        return True
+
+    def reserve(self, nbytes):
+        wait = threading.current_thread() is not threading.main_thread()
+        deadline = time.monotonic() + self.wait_seconds
+        with self.condition:
+            while not self._fits(nbytes):
+                remaining = deadline - time.monotonic()
+                if not wait or remaining <= 0:
+                    if wait:
+                        raise MemoryBudgetExceeded(f"{self.used / 2 ** 20:.0f} MiB of decoded audio held; "
+                                                   f"no room for {nbytes / 2 ** 20:.1f} MiB more")
+                    break
+                # Also re-checked periodically: process memory drops without a release
+                self.condition.wait(min(remaining, 0.5))
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+
+    def release(self, nbytes):
+        with self.condition:
+            self.used -= nbytes
+            self.condition.notify_all()
+
+    def track(self, array, nbytes):
+        # Hands the reservation over to the array's lifetime
+        weakref.finalize(array, self.release, nbytes)
+        return array
+
+
+# Process-wide; the app sets its limits from its own settings
+DECODE_BUDGET = DecodeBudget()
+
+
+def read_mono(sound_file, frames=None, max_bytes=MAX_CLIP_BYTES, budget=DECODE_BUDGET, block_frames=BLOCK_FRAMES):
+    # Reads `frames` frames (default: the rest of the file) from an open
+    # soundfile.SoundFile's current position as mono float32. Mono files are
+    # read straight into the result; multichannel audio is read in blocks
+    # into one reused buffer and averaged (as librosa.to_mono does), so only
+    # the mono result is ever held in full.
+    sr = sound_file.samplerate
+    remaining = max(sound_file.frames - sound_file.tell(), 0)
+    frames = remaining if frames is None else min(frames, remaining)
+    nbytes = frames * np.dtype(np.float32).itemsize
+    if nbytes > max_bytes:
+        raise ClipTooLarge(f"{frames / sr:.1f} s of audio would take {nbytes / 2 ** 20:.0f} MiB decoded; "
+                           f"the limit per clip is {max_bytes / 2 ** 20:.0f} MiB")
+    if budget is not None:
+        budget.reserve(nbytes)
+    try:
+        y = np.empty(frames, dtype=np.float32)
+        if sound_file.channels == 1:
+            read = len(sound_file.read(frames, dtype='float32', out=y))
+        else:
+            block = np.empty((min(block_frames, frames), sound_file.channels), dtype=np.float32)
+            read = 0
+            while read < frames:
+                chunk = sound_file.read(dtype='float32', out=block[:min(len(block), frames - read)])
+                if not len(chunk):
+                    break
+                np.mean(chunk, axis=1, out=y[read:read + len(chunk)])
+                read += len(chunk)
+    except BaseException:
+        if budget is not None:
+            budget.release(nbytes)
+        raise
+    if budget is not None:
+        # Tracked on the full buffer, which every view of it keeps alive
+        budget.track(y, nbytes)
+    # Frame counts in some headers (e.g. MP3) are estimates
+    return (y[:read] if read < frames else y), sr
+
+
+def decode_mono(path, max_bytes=MAX_CLIP_BYTES, budget=DECODE_BUDGET):
+    import soundfile as sf
+
+    with sf.SoundFile(path) as sound_file:
+        return read_mono(sound_file, max_bytes=max_bytes, budget=budget)
@@ -0,0 +1,142 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def to_mono_float32(y):
+    y = np.asarray(y, dtype=np.float32)
+    if y.ndim == 2:
+        y = y.mean(axis=1, dtype=np.float32)
+    return np.ascontiguousarray(y)
+
+
+def resample(y, orig_sr, target_sr):
+    import librosa
+    return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr).astype(np.float32, copy=False)
+
+
+def default_stream_factory(samplerate, callback, blocksize):
+    import sounddevice as sd
+    return sd.OutputStream(samplerate=samplerate, channels=1, dtype='float32', blocksize=blocksize, callback=callback)
+
+
+# One long-lived output stream for the whole session. The PortAudio callback
+# copies from whichever buffer is current, so starting a clip is a reference
+# swap under a lock instead of sd.stop()/sd.play() reopening the device.
+# Upcoming clips are prepared (downmixed and, if needed, resampled to the stream
+# rate) on a background thread and kept in a small ring keyed by path.
+class AudioPlayer:
+    def __init__(self, ring_size=4, blocksize=512, stream_factory=default_stream_factory, metrics=None):
+        self.ring_size = ring_size
+        self.blocksize = blocksize
+        self.stream_factory = stream_factory
+        self.metrics = metrics
+        self.stream = None
+        self.samplerate = None
+
+        self.lock = threading.Lock()
+        self.ring = OrderedDict()
+        self.current_key = None
+        self.current = None
+        self.position = 0
+        self.requested_at = None
+        self.latencies = deque(maxlen=500)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-prepare")
+
+    def _ensure_stream(self, sr):
+        if self.stream is not None and self.stream.active:
+            return
+        if self.stream is not None:
+            # The device went away (e.g. headphones unplugged); open a fresh stream
+            self.stream.close()
+        self.samplerate = self.samplerate or sr
+        self.stream = self.stream_factory(self.samplerate, self._callback, self.blocksize)
+        self.stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        latency = None
+        with self.lock:
+            buffer = self.current
+            start = self.position
+            if buffer is not None:
+                self.position = start + frames
+            if self.requested_at is not None and buffer is not None:
+                latency = time.perf_counter() - self.requested_at
+                self.latencies.append(latency)
+                self.requested_at = None
+        if latency is not None and self.metrics is not None:
+            self.metrics.observe("playback_start", latency)
+        out = outdata[:, 0]
+        if buffer is None or start >= len(buffer):
+            out.fill(0)
+            return
+        chunk = buffer[start:start + frames]
+        out[:len(chunk)] = chunk
+        out[len(chunk):] = 0
+
+    def _prepare(self, y, sr):
+        y = to_mono_float32(y)
+        if self.samplerate is not None and sr != self.samplerate:
+            y = resample(y, sr, self.samplerate)
+        return y
+
+    def _store(self, key, future):
+        with self.lock:
+            self.ring[key] = future
+            self.ring.move_to_end(key)
+            while len(self.ring) > self.ring_size:
+                self.ring.popitem(last=False)
+
+    def preload(self, key, y, sr):
+        # Safe to call from any thread (the clip prefetcher calls it from its workers)
+        if self.samplerate is None:
+            return
+        with self.lock:
+            if key in self.ring:
+                return
+        self._store(key, self.executor.submit(self._prepare, y, sr))
+
+    def play(self, key, y, sr):
+        self._ensure_stream(sr)
+        with self.lock:
+            future = self.ring.get(key)
+        buffer = future.result() if future is not None else self._prepare(y, sr)
+        with self.lock:
+            self.current_key = key
+            self.current = buffer
+            self.position = 0
+            self.requested_at = time.perf_counter()
+
+    def replay(self, key=None):
+        with self.lock:
+            if self.current is None or (key is not None and key != self.current_key):
+                return False
+            self.position = 0
+            self.requested_at = time.perf_counter()
+        return True
+
+    def stop(self):
+        with self.lock:
+            self.current = None
+            self.current_key = None
+            self.requested_at = None
+
+    def latency_stats(self):
+        # Seconds from play()/replay() to the first callback that delivers the clip
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return {}
+        return {"count": len(samples), "p50": samples[len(samples) // 2],
+                "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))], "max": samples[-1]}
+
+    def close(self):
+        self.stop()
+        self.executor.shutdown(wait=False)
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import soundfile as sf
+
+from audio_decode import decode_mono
+from clip_loader import CLIP_DURATION, compute_spectrogram_db_batch
+from spectrogram_cache import SpectrogramCache, clip_cache_key
+from folder_catalog import RESERVED_FOLDERS
+
+
+# Everything precomputed for a main_folder lives under this hidden directory so the
+# GUI can pick it up when the folder is opened.
+PRECOMPUTE_DIR = ".bird_sound_examiner"
+MANIFEST_FILE = "manifest.jsonl"
+SPECTROGRAM_DIR = "spectrograms"
+
+_worker_cache = None
+
+
+def precompute_paths(main_folder):
+    root = os.path.join(main_folder, PRECOMPUTE_DIR)
+    return os.path.join(root, MANIFEST_FILE), os.path.join(root, SPECTROGRAM_DIR)
+
+
+def list_species(main_folder):
+    return sorted(f for f in os.listdir(main_folder)
+                  if os.path.isdir(os.path.join(main_folder, f))
+                  and not f.startswith('.') and f not in RESERVED_FOLDERS)
+
+
+def list_clips(main_folder, species_names):
+    for species in species_names:
+        species_folder = os.path.join(main_folder, species)
+        with os.scandir(species_folder) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(('.wav', '.mp3')):
+                    st = entry.stat()
+                    yield species, entry.path, st.st_size, int(st.st_mtime)
+
+
+def load_manifest(manifest_path):
+    done = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                done.add((record["species"], record["file"], record["size"], record["mtime"]))
+    return done
+
+
+def manifest_durations(manifest_path, species):
+    # name -> (size, mtime, duration) for one species folder, so the GUI can
+    # take the header durations a precompute run already read
+    durations = {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("species") == species and record.get("duration") is not None:
+                durations[record["file"]] = (record["size"], record["mtime"], record["duration"])
+    return durations
+
+
+def _init_worker(spectrogram_dir, store_pcm):
+    global _worker_cache
+    _worker_cache = SpectrogramCache(spectrogram_dir, max_bytes=None, store_pcm=store_pcm)
+
+
+def read_clip(species, path, size, mtime):
+    record = {"species": species, "file": os.path.basename(path), "size": size, "mtime": mtime}
+    y = None
+    try:
+        info = sf.info(path)
+        duration = info.frames / info.samplerate if info.samplerate else 0.0
+        record.update(samplerate=info.samplerate, frames=info.frames, channels=info.channels, duration=duration)
+        reason = None
+        if duration == 0:
+            reason = 'empty'
+        elif duration != CLIP_DURATION:
+            reason = 'wrong_duration'
+        else:
+            y, _ = decode_mono(path)
+            if len(y) / info.samplerate != CLIP_DURATION:
+                reason = 'wrong_duration'
+                y = None
+        record["status"] = reason or "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    return record, y
+
+
+def precompute_chunk(items):
+    records = []
+    to_compute = []
+    for species, path, size, mtime in items:
+        record, y = read_clip(species, path, size, mtime)
+        records.append(record)
+        if y is None:
+            continue
+        record["cache_key"] = clip_cache_key(path)
+        _worker_cache.put_pcm(path, y)
+        if _worker_cache.get_spectrogram(path) is None:
+            to_compute.append((path, y))
+    # One vectorized STFT for the whole chunk instead of one librosa call per clip
+    spectrograms = compute_spectrogram_db_batch([y for _, y in to_compute])
+    for (path, _), S_db in zip(to_compute, spectrograms):
+        _worker_cache.put_spectrogram(path, S_db)
+    return records
+
+
+def report_progress(done, total, started, final=False):
+    # sys.stderr is None in the windowed (no console) build
+    if sys.stderr is None:
+        return
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    rate = done / elapsed
+    eta = (total - done) / rate if rate else 0.0
+    sys.stderr.write(f"\r{done}/{total} clips  {rate:7.1f} clips/s  elapsed {elapsed:6.0f}s  eta {eta:6.0f}s")
+    if final:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def run(main_folder, species_names=None, workers=None, store_pcm=False, batch_size=16):
+    manifest_path, spectrogram_dir = precompute_paths(main_folder)
+    os.makedirs(spectrogram_dir, exist_ok=True)
+
+    species_names = species_names or list_species(main_folder)
+    done = load_manifest(manifest_path)
+    todo = [(species, path, size, mtime) for species, path, size, mtime in list_clips(main_folder, species_names)
+            if (species, os.path.basename(path), size, mtime) not in done]
+    print(f"{len(todo)} clips to precompute in {len(species_names)} species folders ({len(done)} already in manifest)")
+    if not todo:
+        return {}
+
+    counts = {}
+    started = time.perf_counter()
+    last_report = 0.0
+    # Each result is appended as soon as it arrives, so an interrupted run resumes
+    # from the manifest instead of starting over.
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(spectrogram_dir, store_pcm)) as executor:
+        futures = [executor.submit(precompute_chunk, todo[i:i + batch_size]) for i in range(0, len(todo), batch_size)]
+        done_count = 0
+        try:
+            for future in as_completed(futures):
+                records = future.result()
+                for record in records:
+                    manifest.write(json.dumps(record) + "\n")
+                    counts[record["status"]] = counts.get(record["status"], 0) + 1
+                done_count += len(records)
+                now = time.perf_counter()
+                if now - last_report >= 1.0:
+                    manifest.flush()
+                    report_progress(done_count, len(todo), started)
+                    last_report = now
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            manifest.flush()
+            if sys.stderr is not None:
+                sys.stderr.write("\nInterrupted; run the same command again to resume.\n")
+            raise
+    report_progress(len(todo), len(todo), started, final=True)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bird_sounds_filter_app.py precompute",
+                                     description="Screen, decode and precompute spectrograms for every species folder.")
+    parser.add_argument("main_folder", help="Folder containing the species folders")
+    parser.add_argument("--species", nargs="*", help="Only these species folders (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count)")
+    parser.add_argument("--store-pcm", action="store_true", help="Also cache decoded audio for instant playback")
+    parser.add_argument("--batch-size", type=int, default=16, help="Clips per worker task, computed as one batched STFT (default: 16)")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.main_folder, args.species, args.workers, args.store_pcm, args.batch_size)
+    except KeyboardInterrupt:
+        return 130
+    return 0
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fingerprint_index import FingerprintIndex, SIGNATURE_BITS
+
+
+def make_signatures(count, group_size, max_flips, rng):
+    # Groups of near-copies of random signatures, like repeated windows of one call
+    signatures = []
+    for base in rng.integers(0, 1 << 63, -(-count // group_size), dtype=np.int64):
+        for _ in range(group_size):
+            signature = int(base)
+            for bit in rng.choice(SIGNATURE_BITS, rng.integers(0, max_flips + 1), replace=False):
+                signature ^= 1 << int(bit)
+            signatures.append(signature)
+    return signatures[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time adding clips to the near-duplicate index and grouping a "
+                                                 "species queue, and check the groups against a brute-force search.")
+    parser.add_argument('--sizes', default="10000,100000")
+    parser.add_argument('--group-size', type=int, default=5)
+    parser.add_argument('--max-distance', type=int, default=8)
+    parser.add_argument('--check', type=int, default=200, help="queries to verify against brute force")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'clips':>8} {'add s':>7} {'group s':>8} {'groups':>8} {'query us':>9}")
+    for size in (int(n) for n in args.sizes.split(',')):
+        signatures = make_signatures(size, args.group_size, args.max_distance // 2, rng)
+        index = FingerprintIndex(args.max_distance)
+        start = time.perf_counter()
+        for key, signature in enumerate(signatures):
+            index.add(key, signature)
+        add_time = time.perf_counter() - start
+        start = time.perf_counter()
+        groups = index.group(list(range(size)))
+        group_time = time.perf_counter() - start
+
+        all_signatures = np.array(signatures, dtype=np.uint64)
+        queries = rng.choice(size, min(args.check, size), replace=False)
+        start = time.perf_counter()
+        found = [set(index.neighbours(signatures[q])) for q in queries]
+        query_time = (time.perf_counter() - start) / len(queries)
+        for q, keys in zip(queries, found):
+            expected = set(np.flatnonzero(np.bitwise_count(all_signatures ^ np.uint64(signatures[q])) <= args.max_distance))
+            if keys != expected:
+                print(f"FAIL lookup for clip {q}: {len(keys)} found, {len(expected)} expected", file=sys.stderr)
+                return 1
+        print(f"{size:8d} {add_time:7.2f} {group_time:8.2f} {len(groups):8d} {query_time * 1e6:9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import argparse
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clip_loader import compute_spectrogram_db_batch
+from spectrogram_grid import GridRenderer
+
+
+def make_spectrograms(count, sr):
+    rng = np.random.default_rng(0)
+    clips = [rng.standard_normal(int(3.0 * sr)).astype(np.float32) * 0.1 for _ in range(count)]
+    return compute_spectrogram_db_batch(clips)
+
+
+def bench_grid(spectrograms, sr, rows, cols, pages):
+    # Time per page (compose + first show) and per selection redraw
+    fig, ax = plt.subplots(figsize=(12, 6))
+    renderer = GridRenderer(fig, ax, fig.canvas, rows, cols)
+    fig.canvas.draw()
+    tiles = [(spectrograms[i % len(spectrograms)], sr) for i in range(rows * cols)]
+    start = time.perf_counter()
+    for _ in range(pages):
+        renderer.set_page(tiles)
+        renderer.show(title="page")
+    page_time = (time.perf_counter() - start) / pages
+    start = time.perf_counter()
+    for i in range(pages):
+        renderer.show(selected={i % len(tiles)}, decided={0}, title="page")
+    select_time = (time.perf_counter() - start) / pages
+    plt.close(fig)
+    return page_time, select_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time grid pages of growing size (Agg, headless). "
+                                                 "Page time should stay roughly flat as the tile count grows.")
+    parser.add_argument('--sr', type=int, default=22050)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--shapes', default="2x3,4x6,6x8,8x12,10x16")
+    args = parser.parse_args()
+
+    spectrograms = make_spectrograms(32, args.sr)
+    print(f"{'grid':>7} {'tiles':>6} {'page ms':>9} {'select ms':>10}")
+    for shape in args.shapes.split(','):
+        rows, cols = (int(n) for n in shape.split('x'))
+        page_time, select_time = bench_grid(spectrograms, args.sr, rows, cols, args.pages)
+        print(f"{shape:>7} {rows * cols:6d} {page_time * 1000:9.1f} {select_time * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import librosa
+import librosa.display
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectrogram_renderer import SpectrogramRenderer
+
+
+def make_spectrograms(count, sr):
+    rng = np.random.default_rng(0)
+    spectrograms = []
+    for _ in range(count):
+        y = rng.standard_normal(int(3.0 * sr)).astype(np.float32) * 0.1
+        spectrograms.append(librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max))
+    return spectrograms
+
+
+def new_figure():
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('#2C3E50')
+    ax.set_facecolor('#34495E')
+    return fig, ax
+
+
+# The per-clip path display_spectrogram used before the renderer existed
+def bench_specshow(spectrograms, sr):
+    fig, ax = new_figure()
+    start = time.perf_counter()
+    for i, S_db in enumerate(spectrograms):
+        ax.clear()
+        librosa.display.specshow(S_db, y_axis='hz', x_axis='time', ax=ax, sr=sr, cmap='viridis')
+        ax.set_ylim(0, 15000)
+        ax.set_title(f"clip_{i}.wav", color='#ECF0F1')
+        ax.set_xlabel('Time', color='#ECF0F1')
+        ax.set_ylabel('Frequency', color='#ECF0F1')
+        ax.tick_params(colors='#ECF0F1')
+        fig.canvas.draw()
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return len(spectrograms) / elapsed
+
+
+def bench_renderer(spectrograms, sr):
+    fig, ax = new_figure()
+    renderer = SpectrogramRenderer(fig, ax, fig.canvas)
+    fig.canvas.draw()
+    start = time.perf_counter()
+    for i, S_db in enumerate(spectrograms):
+        renderer.show(S_db, sr, f"clip_{i}.wav")
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return len(spectrograms) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare spectrogram rendering throughput (Agg, headless).")
+    parser.add_argument('--clips', type=int, default=50)
+    parser.add_argument('--sr', type=int, default=22050)
+    args = parser.parse_args()
+
+    spectrograms = make_spectrograms(args.clips, args.sr)
+    before = bench_specshow(spectrograms, args.sr)
+    after = bench_renderer(spectrograms, args.sr)
+    print(f"specshow per clip:   {before:8.1f} fps")
+    print(f"SpectrogramRenderer: {after:8.1f} fps")
+    print(f"speedup:             {after / before:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
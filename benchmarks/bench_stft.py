@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import argparse
+
+import librosa
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from stft_engine import BatchSpectrogramEngine
+
+
+def make_clips(count, sr):
+    rng = np.random.default_rng(0)
+    return [(rng.standard_normal(int(3.0 * sr)) * 0.1).astype(np.float32) for _ in range(count)]
+
+
+# The per-clip path display_spectrogram used before the batch engine existed
+def bench_librosa(clips):
+    start = time.perf_counter()
+    results = [librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max) for y in clips]
+    return time.perf_counter() - start, results
+
+
+def bench_engine(clips, batch_size):
+    engine = BatchSpectrogramEngine()
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(clips), batch_size):
+        results.extend(engine.spectrogram_db_many(clips[i:i + batch_size]))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-clip librosa spectrograms with the batched STFT engine.")
+    parser.add_argument('--clips', type=int, default=256)
+    parser.add_argument('--sr', type=int, default=22050)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    clips = make_clips(args.clips, args.sr)
+    # Warm up librosa's lazy imports and the FFT plan caches
+    bench_librosa(clips[:2])
+    bench_engine(clips[:2], 2)
+
+    before, expected = bench_librosa(clips)
+    after, actual = bench_engine(clips, args.batch_size)
+    max_err = max(float(np.max(np.abs(a - e))) for a, e in zip(actual, expected))
+    print(f"librosa per clip:      {args.clips / before:8.1f} clips/s")
+    print(f"BatchSpectrogramEngine: {args.clips / after:8.1f} clips/s (batch {args.batch_size})")
+    print(f"speedup:               {before / after:8.1f}x")
+    print(f"max abs difference:    {max_err:.2e} dB")
+
+
+if __name__ == "__main__":
+    main()
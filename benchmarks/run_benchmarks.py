@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_decode import decode_mono
+from clip_loader import screen_clip, compute_spectrogram_db, warm_up
+from folder_catalog import FolderCatalog, APPROVED, FILTERED_SPECIES_FOLDER, NOISE_FOLDER, FALSE_POSITIVE_FOLDER
+from move_journal import MoveJournal, PENDING
+from spectrogram_renderer import SpectrogramRenderer
+from synthetic_corpus import make_corpus, add_corpus_arguments
+
+
+STAGES = ("scan", "screen", "decode", "stft", "render", "decision", "move", "approved_count")
+PERCENTILES = (50, 90, 95, 99)
+# Stages whose p50 is below this many ms are too noisy to flag on ratio alone
+MIN_REGRESSION_MS = 0.5
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def time(self, stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.samples[stage].append(time.perf_counter() - start)
+        return result
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def summary(self):
+        summary = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ms = np.asarray(samples) * 1000.0
+            summary[stage] = {"count": len(ms), "mean_ms": float(ms.mean()), "max_ms": float(ms.max())}
+            for p in PERCENTILES:
+                summary[stage][f"p{p}_ms"] = float(np.percentile(ms, p))
+        return summary
+
+
+def wait_until_applied(journal, entry, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while entry.status == PENDING and time.perf_counter() < deadline:
+        time.sleep(0.0005)
+
+
+def run_session(main_folder, timer, scan_repeats=5, decisions=("approve", "noise", "false_positive")):
+    catalog_dir = tempfile.mkdtemp(prefix="bench_catalog_")
+    try:
+        # Cold scans: a fresh catalog each time, as on the first open of a folder
+        for i in range(scan_repeats):
+            catalog = FolderCatalog(main_folder, path=os.path.join(catalog_dir, f"scan_{i}.sqlite"))
+            timer.time("scan", catalog.refresh)
+            catalog.close()
+        catalog = FolderCatalog(main_folder, path=os.path.join(catalog_dir, "session.sqlite"))
+        catalog.refresh()
+
+        fig, ax = plt.subplots(figsize=(8, 4))
+        renderer = SpectrogramRenderer(fig, ax, fig.canvas)
+        fig.canvas.draw()
+        journal = MoveJournal(main_folder, journal_path=os.path.join(catalog_dir, "journal.jsonl"))
+        warm_up()
+
+        reviewed = 0
+        for species in catalog.species:
+            for name, _, _, _ in catalog.pending_clips(species):
+                path = os.path.join(main_folder, species, name)
+                reason, _ = timer.time("screen", screen_clip, path)
+                if reason is not None:
+                    continue
+                start = time.perf_counter()
+                y, sr = decode_mono(path)
+                timer.add("decode", time.perf_counter() - start)
+                S_db = timer.time("stft", compute_spectrogram_db, y)
+                timer.time("render", renderer.show, S_db, sr, name)
+
+                decision = decisions[reviewed % len(decisions)]
+                target_folder = {"approve": os.path.join(FILTERED_SPECIES_FOLDER, species),
+                                 "noise": NOISE_FOLDER, "false_positive": FALSE_POSITIVE_FOLDER}[decision]
+                start = time.perf_counter()
+                entry = journal.record(path, os.path.join(main_folder, target_folder, name), decision, species)
+                timer.add("decision", time.perf_counter() - start)
+                wait_until_applied(journal, entry)
+                timer.add("move", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                catalog.refresh(only_species=species)
+                catalog.count(species, APPROVED) + journal.pending_count("approve", species)
+                timer.add("approved_count", time.perf_counter() - start)
+                reviewed += 1
+
+        journal.close()
+        catalog.close()
+        plt.close(fig)
+        return reviewed
+    finally:
+        shutil.rmtree(catalog_dir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for stage, stats in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            limit = max(base[key] * (1.0 + tolerance), base[key] + MIN_REGRESSION_MS)
+            if stats[key] > limit:
+                regressions.append(f"{stage} {key}: {stats[key]:.3f} ms > {limit:.3f} ms (baseline {base[key]:.3f} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the review flow on a synthetic corpus "
+                                                 "(headless, no audio device).")
+    add_corpus_arguments(parser)
+    parser.add_argument('--corpus', help="Use a copy of this main_folder instead of generating one")
+    parser.add_argument('--scan-repeats', type=int, default=5)
+    parser.add_argument('--output', help="Write the JSON results here instead of stdout")
+    parser.add_argument('--baseline', help="Fail if p50/p95 of any stage regress against this results file")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown ratio (default 0.25)")
+    parser.add_argument('--save-baseline', help="Also write the results to this path as the new baseline")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+    main_folder = os.path.join(work_dir, "main_folder")
+    try:
+        # Decisions move files, so every run works on its own copy
+        if args.corpus:
+            shutil.copytree(args.corpus, main_folder)
+            corpus = {"source": os.path.abspath(args.corpus)}
+        else:
+            make_corpus(main_folder, args.species, args.clips, args.durations, args.sample_rates,
+                        args.mp3_fraction, args.seed)
+            corpus = {"species": args.species, "clips": args.clips, "durations": args.durations,
+                      "sample_rates": args.sample_rates, "mp3_fraction": args.mp3_fraction, "seed": args.seed}
+        timer = StageTimer()
+        start = time.perf_counter()
+        reviewed = run_session(main_folder, timer, args.scan_repeats)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {"corpus": corpus, "reviewed": reviewed, "elapsed_s": elapsed,
+               "python": platform.python_version(), "machine": platform.machine(), "stages": timer.summary()}
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import os
+import argparse
+
+import numpy as np
+import soundfile as sf
+
+
+def synth_clip(rng, duration, sr):
+    # Background noise with a short frequency sweep somewhere in the clip, which
+    # is close enough to a detector segment for timing purposes
+    n = int(round(duration * sr))
+    y = rng.standard_normal(n).astype(np.float32) * 0.02
+    start = rng.uniform(0, max(duration - 0.5, 0))
+    t = np.arange(int(0.4 * sr)) / sr
+    f0 = rng.uniform(2000, min(6000, sr / 4))
+    call = 0.3 * np.sin(2 * np.pi * (f0 + 3000 * t) * t).astype(np.float32)
+    i = int(start * sr)
+    y[i:i + len(call)] += call[:max(0, n - i)]
+    return y
+
+
+def mp3_supported():
+    return 'MP3' in sf.available_formats()
+
+
+def make_corpus(main_folder, species=3, clips=50, durations=(3.0,), sample_rates=(22050,), mp3_fraction=0.0,
+                seed=0):
+    rng = np.random.default_rng(seed)
+    if mp3_fraction and not mp3_supported():
+        print("libsndfile has no MP3 support here; writing WAV only")
+        mp3_fraction = 0.0
+    written = 0
+    for s in range(species):
+        species_folder = os.path.join(main_folder, f"species_{s:02d}")
+        os.makedirs(species_folder, exist_ok=True)
+        for c in range(clips):
+            duration = durations[rng.integers(len(durations))]
+            sr = int(sample_rates[rng.integers(len(sample_rates))])
+            y = synth_clip(rng, duration, sr)
+            if rng.random() < mp3_fraction:
+                sf.write(os.path.join(species_folder, f"clip_{c:05d}.mp3"), y, sr, format='MP3')
+            else:
+                sf.write(os.path.join(species_folder, f"clip_{c:05d}.wav"), y, sr)
+            written += 1
+    return written
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--species', type=int, default=3)
+    parser.add_argument('--clips', type=int, default=50, help="Clips per species")
+    parser.add_argument('--durations', type=float, nargs='+', default=[3.0, 3.0, 3.0, 2.5],
+                        help="Clip durations to draw from (repeat a value to weight it)")
+    parser.add_argument('--sample-rates', type=int, nargs='+', default=[22050, 44100])
+    parser.add_argument('--mp3-fraction', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic main_folder of bird clips.")
+    parser.add_argument('main_folder')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    written = make_corpus(args.main_folder, args.species, args.clips, args.durations, args.sample_rates,
+                          args.mp3_fraction, args.seed)
+    print(f"Wrote {written} clips to {args.main_folder}")
+
+
+if __name__ == "__main__":
+    main()
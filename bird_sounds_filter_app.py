@@ -1,37 +1,53 @@
-import tkinter as tk
-from tkinter import filedialog, ttk, messagebox, simpledialog
+import time
+_STARTED = time.perf_counter()
 import os
 import sys
+import hashlib
+import threading
+import multiprocessing
 
 if getattr(sys, 'frozen', False):
     os.environ['PATH'] = sys._MEIPASS + os.pathsep + os.environ['PATH']
+    if __name__ == "__main__":
+        # Must run before the GUI imports so frozen precompute workers stay headless
+        multiprocessing.freeze_support()
 
-import shutil
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import librosa
-import numpy as np
+# "precompute" mode and its spawned worker processes must not import tkinter/matplotlib
+HEADLESS = __name__ == "__mp_main__" or (__name__ == "__main__" and sys.argv[1:2] == ["precompute"])
+
+if not HEADLESS:
+    import tkinter as tk
+    from tkinter import filedialog, ttk, messagebox, simpledialog
 import traceback
-import soundfile as sf
-import sounddevice as sd
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from app_logging import AppLogging, LoggingPrint
+from move_journal import MoveJournal, FAILED, PENDING
+from folder_catalog import FolderCatalog, APPROVED, NOISE, FALSE_POSITIVE, PENDING as CLIP_PENDING
+from startup_timing import StartupTimer
+from latency_metrics import LatencyMetrics
 
+# numpy, soundfile, sounddevice, matplotlib and librosa (with numba) take seconds to
+# import, so the window is shown first and they are loaded by import_analysis_stack
+# on a background thread. Methods that need them import locally; by then the
+# modules are already in sys.modules and the import is just a lookup.
 
-class LoggingPrint:
-    def __init__(self, filename):
-        self.terminal = sys.stdout
-        self.log = open(filename, "a")
 
-    def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
-        self.log.flush()
+def import_analysis_stack():
+    import matplotlib
+    matplotlib.use('TkAgg')
+    import matplotlib.pyplot
+    import matplotlib.backends.backend_tkagg
+    import sounddevice
+    import soundfile
+    import audio_output
+    import spectrogram_cache
+    import spectrogram_renderer
+    import batch_precompute
+    import clip_loader
+    clip_loader.warm_up()
 
-    def flush(self):
-        self.terminal.flush()
-        self.log.flush()
 
 class BirdSoundApp:
     def __init__(self, master):
@@ -46,6 +62,8 @@ class BirdSoundApp:
 
         self.main_folder = ""
         self.current_species = tk.StringVar()
+        self.species_choice = tk.StringVar()
+        self.species_names = []
         self.current_file = ""
         self.files_to_examine = []
 
@@ -56,16 +74,144 @@ class BirdSoundApp:
         self.max_seg_num = 500
         self.approved_count = tk.IntVar(value=0)
 
+        # triage: score clips so the queue can be sorted and obvious noise routed away
+        self.order_by_score = tk.BooleanVar(value=False)
+        self.auto_route_noise = tk.BooleanVar(value=False)
+        self.auto_noise_threshold = 0.95
+        self.triage_result = None
+        self.screening_result = None
+        # (main_folder, species) while screening, scoring or fingerprinting runs; Start stays disabled
+        self.background_job = None
+
+        # near-duplicates: one clip per group of similar clips is shown, its decision covers the group
+        self.group_duplicates = tk.BooleanVar(value=False)
+        self.duplicate_distance = 8
+        self.fingerprint_index = None
+        self.grouping_result = None
+        self.duplicates = {}
+        # Per decision (one key press, which may cover a whole grid page), the
+        # history entries written for each group it decided, so Undo takes it all back
+        self.decided_groups = []
+
+        # shared review: several instances split a species folder through lease files
+        self.shared_review = tk.BooleanVar(value=False)
+        self.leases = None
+        self.unclaimed = []
+        # Clips triage found to be noise and not yet routed; in shared review each
+        # is only routed once this reviewer holds its lease
+        self.likely_noise = set()
+
+        # grid review: a page of thumbnails, decisions apply to the selected tiles
+        self.grid_mode = tk.BooleanVar(value=False)
+        self.grid_rows = 4
+        self.grid_cols = 6
+        self.grid_renderer = None
+        self.page = []
+        self.page_selected = set()
+        self.page_decided = {}
+        self.hover_tile = None
+        self.page_executor = None
+        self.next_page = None
+
+        self.startup_timer = StartupTimer(_STARTED)
+        self.startup_timer.mark("imports_done")
+
         # logging
-        temp_dir = tempfile.gettempdir()
-        self.log_file = os.path.join(temp_dir, 'bird_sound_examiner_log.txt')
+        self.logging = AppLogging()
+        self.logger = self.logging.logger
+        self.log_message("Application started")
+
+        # dB spectrograms (and decoded PCM) persist across sessions; created in on_analysis_ready
+        self.cache_max_bytes = 2 * 1024 ** 3
+        self.local_cache = None
+        self.spectrogram_cache = None
+
+        # decode + STFT the next clips while the current one is being judged
+        self.prefetch_depth = 3
+        self.prefetcher = None
+        # decoded audio held at once, and the whole process, before background decoding waits
+        self.audio_memory_limit = 512 * 1024 ** 2
+        self.process_memory_ceiling = 2 * 1024 ** 3
+        self.player = None
+        self.screen_workers = 8
+
+        # decisions are journaled and moved in the background; see open_journal
+        self.journal = None
+        self.catalog = None
+        self.reported_failures = 0
+
+        # packed clip source (archive or segment index); decisions go to a label manifest
+        self.source = None
+        self.labels = None
+        self.export_result = None
+
+        self.analysis_ready = False
+        self.analysis_error = None
+
+        # per-stage latencies, exported on close; the live panel is optional
+        self.metrics = LatencyMetrics()
+        self.show_stats = tk.BooleanVar(value=False)
+        self.stats_job = None
+        self.decision_started = None
+
+        self.create_widgets()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.master.bind('<Map>', self.on_first_map, add='+')
+        self.startup_timer.mark("window_built")
+        self.poll_mover()
+
+        threading.Thread(target=self.load_analysis_stack, name="analysis-import", daemon=True).start()
+        self.master.after(50, self.poll_analysis_stack)
+
+    def on_first_map(self, event):
+        if event.widget is self.master and "first_paint" not in self.startup_timer.milestones:
+            self.master.after_idle(self.startup_timer.mark, "first_paint")
+
+    def load_analysis_stack(self):
         try:
-            with open(self.log_file, 'a') as f:
-                f.write("Application started\n")
+            import_analysis_stack()
         except Exception as e:
-            print(f"Warning: Unable to create or write to log file. Error: {e}")
-            self.log_file = None
-        self.create_widgets()
+            self.analysis_error = f"{e}\n\nTraceback:\n{traceback.format_exc()}"
+        self.startup_timer.mark("analysis_imported")
+
+    def poll_analysis_stack(self):
+        if "analysis_imported" not in self.startup_timer.milestones:
+            self.master.after(50, self.poll_analysis_stack)
+            return
+        if self.analysis_error:
+            self.spec_placeholder.config(text="Unable to load the audio engine")
+            self.log_error(f"Error loading audio and spectrogram libraries:\n{self.analysis_error}")
+            return
+        self.on_analysis_ready()
+
+    def on_analysis_ready(self):
+        from clip_loader import ClipPrefetcher
+        from spectrogram_cache import SpectrogramCache, DEFAULT_CACHE_DIR
+        from audio_output import AudioPlayer
+        from audio_decode import DECODE_BUDGET
+
+        DECODE_BUDGET.configure(self.audio_memory_limit, self.process_memory_ceiling)
+        try:
+            self.local_cache = SpectrogramCache(DEFAULT_CACHE_DIR, self.cache_max_bytes, store_pcm=True)
+        except OSError as e:
+            self.log_message(f"Unable to create spectrogram cache. Error: {e}", logging.WARNING)
+            self.local_cache = None
+        self.spectrogram_cache = self.local_cache
+        self.player = AudioPlayer(metrics=self.metrics)
+        self.prefetcher = ClipPrefetcher(depth=self.prefetch_depth, cache=self.spectrogram_cache,
+                                         on_loaded=lambda clip: self.player.preload(clip.path, clip.y, clip.sr),
+                                         metrics=self.metrics, source=self.source)
+
+        self.spec_placeholder.destroy()
+        self.create_spectrogram_canvas()
+        self.analysis_ready = True
+        self.start_button.config(text="Start Examination", state=tk.NORMAL)
+        if self.main_folder:
+            self.open_spectrogram_cache()
+
+        self.startup_timer.mark("analysis_ready")
+        self.log_message(f"Startup: {self.startup_timer.summary()}")
+        self.startup_timer.record()
  
     def create_widgets(self):
         main_frame = ttk.Frame(self.master, padding="20 20 20 20")
@@ -82,13 +228,14 @@ class BirdSoundApp:
         guidance_text = (
             "1. Choose the main folder containing all species folders.\n"
             "2. Select the species you wish to work on from the dropdown.\n"
-            "3. Set the maximum files threshold if needed.\n"
+            "3. Set the maximum files threshold if needed, and optionally order the queue by triage score.\n"
             "4. Click 'Start Examination' to begin.\n"
             "5. For each audio file, you have three ways to make a decision:\n"
             "   - True Positive: Press SPACE, Left-click, or 'True Positive' button\n"
             "   - Noise: Press RIGHT ARROW, Right-click, or 'Noise' button\n"
             "   - False Positive: Press LEFT ARROW, Middle-click, or 'False Positive' button\n"
-            "   - Use 'Play Again' button to replay the current audio"
+            "   - Use 'Play Again' button to replay the current audio\n"
+            "   - Press BACKSPACE, Ctrl+Z, or 'Undo' to revert the last decision"
         )
         guidance_label = ttk.Label(guidance_frame, text=guidance_text, justify=tk.LEFT, wraplength=900, font=('Helvetica', 12))
         guidance_label.pack(pady=5)
@@ -100,15 +247,21 @@ class BirdSoundApp:
         self.folder_button = ttk.Button(folder_frame, text="Select Folder", command=self.select_folder, style="RoundedButton.TButton")
         self.folder_button.pack(side=tk.LEFT)
 
+        self.source_button = ttk.Button(folder_frame, text="Open Clip Archive", command=self.select_source, style="RoundedButton.TButton")
+        self.source_button.pack(side=tk.LEFT, padx=5)
+
         self.folder_label = ttk.Label(folder_frame, text="No folder selected", font=('Helvetica', 10, 'italic'))
         self.folder_label.pack(side=tk.LEFT, padx=10)
 
+        self.export_button = ttk.Button(folder_frame, text="Export Labels", command=self.export_labels, style="RoundedButton.TButton", state=tk.DISABLED)
+        self.export_button.pack(side=tk.RIGHT)
+
         # Species selection
         species_frame = ttk.Frame(main_frame)
         species_frame.pack(pady=10, fill=tk.X)
 
         ttk.Label(species_frame, text="Select Species:", font=('Helvetica', 11)).pack(side=tk.LEFT)
-        self.species_dropdown = ttk.Combobox(species_frame, textvariable=self.current_species, state="readonly", font=('Helvetica', 10))
+        self.species_dropdown = ttk.Combobox(species_frame, textvariable=self.species_choice, state="readonly", font=('Helvetica', 10), postcommand=self.refresh_species_labels)
         self.species_dropdown.pack(side=tk.LEFT, padx=10, expand=True, fill=tk.X)
         self.species_dropdown.bind("<<ComboboxSelected>>", self.on_species_selected)
 
@@ -122,8 +275,18 @@ class BirdSoundApp:
         self.threshold_label = ttk.Label(threshold_frame, text=f"Max Files: {self.max_seg_num}", font=('Helvetica', 10, 'italic'))
         self.threshold_label.pack(side=tk.LEFT, padx=10)
 
-        # Start button
-        self.start_button = ttk.Button(main_frame, text="Start Examination", command=self.start_examination, style="RoundedAccent.TButton")
+        # Triage
+        self.auto_route_check = ttk.Checkbutton(threshold_frame, text=f"Auto-route likely noise (confidence >= {self.auto_noise_threshold:.2f})", variable=self.auto_route_noise)
+        self.auto_route_check.pack(side=tk.RIGHT, padx=10)
+        self.order_by_score_check = ttk.Checkbutton(threshold_frame, text="Order queue by triage score", variable=self.order_by_score)
+        self.order_by_score_check.pack(side=tk.RIGHT, padx=10)
+        self.shared_review_check = ttk.Checkbutton(threshold_frame, text="Shared review (several reviewers)", variable=self.shared_review)
+        self.shared_review_check.pack(side=tk.RIGHT, padx=10)
+        self.group_duplicates_check = ttk.Checkbutton(threshold_frame, text="Group near-duplicates", variable=self.group_duplicates)
+        self.group_duplicates_check.pack(side=tk.RIGHT, padx=10)
+
+        # Start button (enabled once the audio engine has loaded)
+        self.start_button = ttk.Button(main_frame, text="Loading audio engine...", command=self.start_examination, style="RoundedAccent.TButton", state=tk.DISABLED)
         self.start_button.pack(pady=20)
 
         # Control buttons
@@ -143,33 +306,89 @@ class BirdSoundApp:
         self.fp_button = ttk.Button(control_frame, text="False Positive", command=self.false_positive_decision, style="RoundedFalsePositive.TButton", width=button_width)
         self.fp_button.pack(side=tk.LEFT, padx=5)
 
+        self.undo_button = ttk.Button(control_frame, text="Undo", command=self.undo_decision, style="RoundedButton.TButton")
+        self.undo_button.pack(side=tk.LEFT, padx=5)
+
         # Approved count
         self.approved_count_label = ttk.Label(control_frame, text="Approved Files: 0", font=('Helvetica', 12, 'bold'))
         self.approved_count_label.pack(side=tk.RIGHT, padx=20)
 
+        self.mover_label = ttk.Label(control_frame, text="", font=('Helvetica', 10, 'italic'))
+        self.mover_label.pack(side=tk.RIGHT, padx=5)
+
+        # Live stats
+        stats_frame = ttk.Frame(main_frame)
+        stats_frame.pack(fill=tk.X)
+
+        self.grid_mode_check = ttk.Checkbutton(stats_frame, text=f"Grid review ({self.grid_rows}x{self.grid_cols} clips per page)", variable=self.grid_mode)
+        self.grid_mode_check.pack(side=tk.LEFT, padx=5)
+
+        self.show_stats_check = ttk.Checkbutton(stats_frame, text="Show live stats", variable=self.show_stats, command=self.poll_stats)
+        self.show_stats_check.pack(side=tk.LEFT, padx=5)
+
+        self.stats_label = ttk.Label(stats_frame, text="", font=('Helvetica', 10, 'italic'))
+        self.stats_label.pack(side=tk.LEFT, padx=10)
+
         # Spectrogram
         spec_frame = ttk.Frame(main_frame)
         spec_frame.pack(pady=10, expand=True, fill=tk.BOTH)
 
+        self.spec_frame = spec_frame
+        self.spec_placeholder = ttk.Label(spec_frame, text="Loading spectrogram engine...", font=('Helvetica', 12, 'italic'), anchor=tk.CENTER)
+        self.spec_placeholder.pack(expand=True, fill=tk.BOTH)
+
+        # Bind keyboard shortcuts
+        self.master.bind('<space>', self.approve_decision)
+        self.master.bind('<Left>', self.false_positive_decision)
+        self.master.bind('<Right>', self.noise_decision)
+        self.master.bind('<BackSpace>', self.undo_decision)
+        self.master.bind('<Control-z>', self.undo_decision)
+
+    def create_spectrogram_canvas(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from spectrogram_renderer import SpectrogramRenderer
+
         self.fig, self.ax = plt.subplots(figsize=(8, 4))
         self.fig.patch.set_facecolor('#2C3E50')
         self.ax.set_facecolor('#34495E')
         self.ax.tick_params(colors='#ECF0F1')
         for spine in self.ax.spines.values():
             spine.set_edgecolor('#ECF0F1')
-        self.canvas = FigureCanvasTkAgg(self.fig, master=spec_frame)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.spec_frame)
+        self.renderer = SpectrogramRenderer(self.fig, self.ax, self.canvas)
         self.canvas.draw()
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.pack(expand=True, fill=tk.BOTH)
 
-        # Bind keyboard shortcuts
-        self.master.bind('<space>', self.approve_decision)
-        self.master.bind('<Left>', self.false_positive_decision)
-        self.master.bind('<Right>', self.noise_decision)
+
         self.canvas_widget.bind("<Button-1>", self.approve_decision)
         self.canvas_widget.bind("<Button-2>", self.false_positive_decision)
         self.canvas_widget.bind("<Button-3>", self.noise_decision)
     
+    def create_grid_canvas(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from spectrogram_grid import GridRenderer
+
+        self.grid_fig, self.grid_ax = plt.subplots(figsize=(12, 6))
+        self.grid_fig.patch.set_facecolor('#2C3E50')
+        self.grid_canvas = FigureCanvasTkAgg(self.grid_fig, master=self.spec_frame)
+        self.grid_renderer = GridRenderer(self.grid_fig, self.grid_ax, self.grid_canvas, self.grid_rows, self.grid_cols)
+        self.grid_canvas.mpl_connect('button_press_event', self.on_grid_click)
+        self.grid_canvas.mpl_connect('motion_notify_event', self.on_grid_hover)
+        self.grid_canvas_widget = self.grid_canvas.get_tk_widget()
+
+    def show_grid_canvas(self, grid):
+        if grid and self.grid_renderer is None:
+            self.create_grid_canvas()
+        if grid:
+            self.canvas_widget.pack_forget()
+            self.grid_canvas_widget.pack(expand=True, fill=tk.BOTH)
+        elif self.grid_renderer is not None:
+            self.grid_canvas_widget.pack_forget()
+            self.canvas_widget.pack(expand=True, fill=tk.BOTH)
+
     def approve_decision(self, event=None):
         self.process_decision("approve")
 
@@ -184,6 +403,8 @@ class BirdSoundApp:
         self.style.configure("TLabel", background="#2C3E50", foreground="#ECF0F1", font=('Helvetica', 10))
         self.style.configure("TLabelframe", background="#2C3E50", foreground="#ECF0F1")
         self.style.configure("TLabelframe.Label", background="#2C3E50", foreground="#ECF0F1", font=('Helvetica', 12, 'bold'))
+        self.style.configure("TCheckbutton", background="#2C3E50", foreground="#ECF0F1", font=('Helvetica', 10))
+        self.style.map("TCheckbutton", background=[('active', '#34495E')])
 
         # Custom button styles with rounded corners
         self.style.layout("RoundedButton.TButton", 
@@ -254,186 +475,1101 @@ class BirdSoundApp:
     def select_folder(self):
         new_folder = filedialog.askdirectory()
         if new_folder:
+            self.close_source()
+            self.close_leases()
             self.main_folder = new_folder
             self.folder_label.config(text=self.main_folder)
+            self.open_journal()
+            if self.analysis_ready:
+                self.open_spectrogram_cache()
+            if self.catalog:
+                self.catalog.close()
+            self.catalog = FolderCatalog(self.main_folder, metrics=self.metrics)
             self.update_species_dropdown()
             self.reset_examination()
             self.update_approved_count()
     
+    def select_source(self):
+        from clip_sources import open_clip_source
+        from label_manifest import LabelManifest, labels_path, fallback_labels_path
+
+        path = filedialog.askopenfilename(filetypes=[("Clip archives and segment indexes", "*.zip *.tar *.tar.gz *.tgz *.csv"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            source = open_clip_source(path)
+        except Exception as e:
+            self.log_error(f"Unable to open clip source:\n{path}\n\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}")
+            return
+        self.close_source()
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        if self.catalog:
+            self.catalog.close()
+            self.catalog = None
+        self.close_leases()
+        self.main_folder = ""
+        self.source = source
+        try:
+            self.labels = LabelManifest(labels_path(path))
+        except OSError as e:
+            # Read-only share: keep the labels next to the log instead
+            self.log_message(f"Unable to write labels next to {path}: {e}. Using {fallback_labels_path(path)}", logging.WARNING)
+            self.labels = LabelManifest(fallback_labels_path(path))
+        if self.prefetcher:
+            self.prefetcher.cancel()
+            self.prefetcher.source = source
+        self.log_message(f"Opened clip source {path} ({len(source.clips)} clips), labels in {self.labels.path}")
+        self.folder_label.config(text=path)
+        self.export_button.config(state=tk.NORMAL)
+        self.update_species_dropdown()
+        self.reset_examination()
+        self.update_approved_count()
+
+    def close_source(self):
+        if self.prefetcher:
+            self.prefetcher.cancel()
+            self.prefetcher.source = None
+        if self.labels:
+            self.labels.close()
+            self.labels = None
+        if self.source:
+            self.source.close()
+            self.source = None
+        self.export_button.config(state=tk.DISABLED)
+
+    def export_labels(self):
+        if not self.source:
+            return
+        out_folder = filedialog.askdirectory(title="Export labeled clips to")
+        if not out_folder:
+            return
+        self.export_result = None
+        self.export_button.config(text="Exporting...", state=tk.DISABLED)
+        source, labels = self.source, self.labels
+
+        def run():
+            from clip_sources import export_labels
+            try:
+                self.export_result = export_labels(source, labels, out_folder)
+            except Exception as e:
+                self.export_result = e
+
+        threading.Thread(target=run, name="label-export", daemon=True).start()
+        self.master.after(200, self.poll_export, out_folder)
+
+    def poll_export(self, out_folder):
+        if self.export_result is None:
+            self.master.after(200, self.poll_export, out_folder)
+            return
+        self.export_button.config(text="Export Labels", state=tk.NORMAL if self.source else tk.DISABLED)
+        if isinstance(self.export_result, Exception):
+            self.log_error(f"Error exporting labels to {out_folder}: {self.export_result}")
+            return
+        written, renamed = self.export_result
+        self.log_message(f"Exported {written} labeled clips to {out_folder}")
+        message = f"Exported {written} clips to:\n{out_folder}"
+        if renamed:
+            self.log_message(f"{renamed} clips sharing a name with another species' clip were exported as <species>__<name>")
+            message += f"\n\n{renamed} clips sharing a name with another species' clip were named <species>__<name>."
+        messagebox.showinfo("Export Complete", message)
+
+    def open_journal(self):
+        if self.journal:
+            self.journal.close()
+        self.reported_failures = 0
+        try:
+            self.journal = MoveJournal(self.main_folder, metrics=self.metrics)
+        except OSError as e:
+            # Read-only share: keep the journal next to the log instead
+            folder_hash = hashlib.sha1(os.path.abspath(self.main_folder).encode('utf-8')).hexdigest()[:10]
+            journal_path = os.path.join(tempfile.gettempdir(), f'bird_sound_examiner_journal_{folder_hash}.jsonl')
+            self.log_message(f"Unable to write decision journal in {self.main_folder}: {e}. Using {journal_path}", logging.WARNING)
+            self.journal = MoveJournal(self.main_folder, journal_path=journal_path, metrics=self.metrics)
+        replayed = self.journal.replay()
+        if replayed:
+            self.log_message(f"Replaying {replayed} unapplied decisions from {self.journal.path}")
+
+    def open_spectrogram_cache(self):
+        from spectrogram_cache import SpectrogramCache, LayeredCache
+        from batch_precompute import precompute_paths
+
+        # Prefer spectrograms written by the headless "precompute" mode for this
+        # folder; anything computed here still goes to the local budgeted cache
+        self.spectrogram_cache = self.local_cache
+        _, spectrogram_dir = precompute_paths(self.main_folder)
+        if os.path.isdir(spectrogram_dir):
+            try:
+                precomputed = SpectrogramCache(spectrogram_dir, max_bytes=None, store_pcm=True)
+                self.spectrogram_cache = LayeredCache(precomputed, self.local_cache)
+                self.log_message(f"Using precomputed spectrograms in {spectrogram_dir}")
+            except OSError as e:
+                self.log_message(f"Unable to open precomputed spectrograms in {spectrogram_dir}: {e}", logging.WARNING)
+        self.prefetcher.cancel()
+        self.prefetcher.cache = self.spectrogram_cache
+
+    def poll_mover(self):
+        if self.leases:
+            try:
+                self.leases.heartbeat()
+            except OSError as e:
+                self.log_message(f"Unable to renew clip leases: {e}", logging.WARNING)
+        if self.journal:
+            stats = self.journal.stats()
+            self.mover_label.config(text=f"Pending moves: {stats[PENDING]}" if stats[PENDING] else "")
+            if stats[FAILED] > self.reported_failures:
+                self.reported_failures = stats[FAILED]
+                self.log_message(f"File move failed: {self.journal.last_error}", logging.ERROR)
+                messagebox.showwarning("Move Failed", f"{stats[FAILED]} file moves failed after retrying.\nLast error: {self.journal.last_error}\n\nThey will be retried the next time this folder is opened.")
+        self.master.after(500, self.poll_mover)
+
+    def poll_stats(self):
+        if self.stats_job is not None:
+            # Ticking the checkbox again must not start a second polling loop
+            self.master.after_cancel(self.stats_job)
+            self.stats_job = None
+        if not self.show_stats.get():
+            self.stats_label.config(text="")
+            return
+        latency = self.metrics.recent_percentiles("decision_to_display")
+        text = f"Clips/min: {self.metrics.rate_per_minute('decision_to_display'):.1f}"
+        if latency[50] is not None:
+            text += f"   Decision to display: p50 {latency[50] * 1000:.0f} ms, p95 {latency[95] * 1000:.0f} ms"
+        stages = []
+        for stage in ("decode", "stft", "render", "playback_start", "move"):
+            p95 = self.metrics.recent_percentiles(stage, (95,))[95]
+            if p95 is not None:
+                stages.append(f"{stage} {p95 * 1000:.0f}")
+        if stages:
+            text += f"   p95 ms: {', '.join(stages)}"
+        if self.analysis_ready:
+            from audio_decode import DECODE_BUDGET, process_memory_bytes
+
+            memory = f"decoded audio {DECODE_BUDGET.used / 2 ** 20:.0f}/{DECODE_BUDGET.limit_bytes / 2 ** 20:.0f} MB"
+            process_bytes = process_memory_bytes()
+            if process_bytes is not None:
+                memory = f"{process_bytes / 2 ** 20:.0f} MB ({memory})"
+            text += f"   Memory: {memory}"
+        self.stats_label.config(text=text)
+        self.stats_job = self.master.after(1000, self.poll_stats)
+
+    def on_close(self):
+        if self.prefetcher:
+            self.prefetcher.shutdown()
+        if self.page_executor:
+            self.page_executor.shutdown(wait=False, cancel_futures=True)
+        if self.player:
+            self.player.close()
+        if self.journal:
+            self.journal.close()
+        self.close_leases()
+        if self.catalog:
+            self.catalog.close()
+        self.close_source()
+        try:
+            info = {"main_folder": self.main_folder}
+            if self.analysis_ready:
+                from audio_decode import DECODE_BUDGET, process_memory_bytes
+
+                info.update(process_memory_bytes=process_memory_bytes(), decoded_audio_peak_bytes=DECODE_BUDGET.peak)
+            written = self.metrics.export(info=info)
+            if written:
+                self.log_message(f"Latency metrics written to {', '.join(written)}")
+        except OSError as e:
+            self.log_message(f"Unable to write latency metrics: {e}", logging.WARNING)
+        self.logging.stop()
+        self.master.destroy()
+
     def reset_examination(self):
         self.current_file = ""
         self.files_to_examine = []
-        self.start_button.config(state=tk.NORMAL)
-        self.ax.clear()
-        self.canvas.draw()
+        self.decision_started = None
+        self.unclaimed = []
+        self.likely_noise = set()
+        self.duplicates = {}
+        self.decided_groups = []
+        if self.leases:
+            self.leases.release()
+        self.clear_page()
+        if not self.analysis_ready:
+            return
+        self.prefetcher.cancel()
+        self.player.stop()
+        self.enable_start()
+        self.renderer.clear()
 
     def update_species_dropdown(self):
-        species = [f for f in os.listdir(self.main_folder) if os.path.isdir(os.path.join(self.main_folder, f))]
-        self.species_dropdown['values'] = species
-        if species:
-            self.species_dropdown.set(species[0])
+        self.refresh_species_labels()
+        if self.species_names:
+            self.species_dropdown.current(0)
+            self.current_species.set(self.species_names[0])
+        else:
+            self.species_choice.set("")
+            self.current_species.set("")
+
+    def refresh_species_labels(self):
+        if self.source:
+            self.refresh_source_species_labels()
+            return
+        if not self.catalog:
+            return
+        changed = self.catalog.refresh(self.species_hints)
+        if changed:
+            self.log_message(f"Catalog rescanned {changed} changed folders", logging.DEBUG)
+        counts = self.catalog.counts()
+        self.species_names = list(self.catalog.species)
+        labels = []
+        for species in self.species_names:
+            c = counts[species]
+            labels.append(f"{species}  (pending {c[CLIP_PENDING]}, approved {c[APPROVED]}, noise {c[NOISE]}, false positive {c[FALSE_POSITIVE]})")
+        self.species_dropdown['values'] = labels
+        if self.current_species.get() in self.species_names:
+            self.species_choice.set(labels[self.species_names.index(self.current_species.get())])
+
+    def refresh_source_species_labels(self):
+        from clip_sources import clip_key
+
+        decisions = self.labels.decisions()
+        self.species_names = self.source.species()
+        labels = []
+        for species in self.species_names:
+            names = self.source.clip_names(species)
+            decided = [decisions[clip_key(species, n)] for n in names if clip_key(species, n) in decisions]
+            labels.append(f"{species}  (pending {len(names) - len(decided)}, approved {decided.count('approve')}, "
+                          f"noise {decided.count('noise')}, false positive {decided.count('false_positive')})")
+        self.species_dropdown['values'] = labels
+        if self.current_species.get() in self.species_names:
+            self.species_choice.set(labels[self.species_names.index(self.current_species.get())])
+
+    def species_hints(self):
+        return self.journal.species_by_name() if self.journal else {}
 
     def on_species_selected(self, event):
-        self.start_button.config(state=tk.NORMAL)
+        index = self.species_dropdown.current()
+        if 0 <= index < len(self.species_names):
+            self.current_species.set(self.species_names[index])
+        self.files_to_examine = []
+        self.unclaimed = []
+        self.likely_noise = set()
+        self.duplicates = {}
+        self.decided_groups = []
+        if self.leases:
+            self.leases.release()
+        self.clear_page()
+        if self.analysis_ready:
+            self.prefetcher.cancel()
+            self.enable_start()
         self.update_approved_count()
 
     def start_examination(self):
+        if self.source:
+            self.start_source_examination()
+            return
         species_folder = os.path.normpath(os.path.join(self.main_folder, self.current_species.get()))
         self.log_message(f"Starting examination for species folder: {species_folder}")
         try:
-            all_files = [f for f in os.listdir(species_folder) if f.lower().endswith(('.wav', '.mp3'))]
-            self.log_message(f"All files found: {all_files}")
-            self.files_to_examine = all_files.copy()
-            self.log_message(f"Files to examine (randomized): {self.files_to_examine}")
-            if self.files_to_examine:
-                self.start_button.config(state=tk.DISABLED)
-                self.examine_next_file()
-            else:
+            species = self.current_species.get()
+            self.catalog.refresh(self.species_hints, only_species=species)
+            clips = self.catalog.pending_clips(species)
+            # Clips already decided but still waiting for the mover stay in the folder for a moment
+            pending = self.journal.pending_sources() if self.journal else set()
+            clips = [row for row in clips if os.path.normpath(os.path.join(species_folder, row[0])) not in pending]
+            all_files = [row[0] for row in clips]
+            self.log_message(f"All files found: {len(all_files)}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.log_message(f"All files found: {all_files}", logging.DEBUG)
+            if not all_files:
                 self.log_message(f"No WAV or MP3 files found in the folder: {species_folder}")
                 messagebox.showinfo("No Files", f"No WAV or MP3 files found in the folder:\n{species_folder}")
+                return
+            self.start_screening(species, clips)
         except Exception as e:
             error_msg = f"Error accessing species folder:\n{species_folder}\n\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-            self.log_message(error_msg)
             self.log_error(error_msg)
 
-    def examine_next_file(self):
-        self.log_message(f"Entering examine_next_file. Files to examine: {len(self.files_to_examine)}")
+    def start_screening(self, species, clips):
+        # Durations already in the catalog don't need their headers read again.
+        # The rest are taken from a precompute run's manifest where the clip is
+        # unchanged since, and read from the headers otherwise, on a background
+        # thread: a first look at a large folder on a share takes a while.
+        from batch_precompute import precompute_paths, manifest_durations
+        from clip_loader import screen_clips
+
+        species_folder = os.path.join(self.main_folder, species)
+        unknown = self.catalog.unknown_durations(species)
+        manifest_path, _ = precompute_paths(self.main_folder)
+        self.screening_result = None
+        self.background_job = (self.main_folder, species)
+        self.start_button.config(text=f"Screening {len(unknown)} clips...", state=tk.DISABLED)
+        self.log_message(f"Screening {len(unknown)} clips ({len(clips) - len(unknown)} durations cached)")
+
+        def run():
+            try:
+                durations = {}
+                if unknown and os.path.exists(manifest_path):
+                    for name, (size, mtime, duration) in manifest_durations(manifest_path, species).items():
+                        if unknown.get(name) == (size, mtime):
+                            durations[name] = duration
+                to_read = [os.path.join(species_folder, name) for name in unknown if name not in durations]
+                _, _, read = screen_clips(to_read, self.screen_workers)
+                read = {os.path.basename(path): duration for path, duration in read.items()}
+                self.screening_result = (len(durations), {**durations, **read})
+            except Exception as e:
+                self.screening_result = e
+
+        if not unknown:
+            # Every duration is cached; nothing to wait for
+            run()
+            self.poll_screening(species, clips)
+            return
+        threading.Thread(target=run, name="clip-screen", daemon=True).start()
+        self.master.after(100, self.poll_screening, species, clips)
+
+    def poll_screening(self, species, clips):
+        from clip_loader import CLIP_DURATION
+
+        if self.screening_result is None:
+            self.master.after(100, self.poll_screening, species, clips)
+            return
+        folder = self.finish_background_job()
+        if isinstance(self.screening_result, Exception):
+            self.log_error(f"Error screening clips: {self.screening_result}")
+            self.enable_start()
+            return
+        from_manifest, durations = self.screening_result
+        if folder == self.main_folder:
+            self.catalog.set_durations(species, durations)
+        if not self.job_still_current(folder, species):
+            return
+        if from_manifest:
+            self.log_message(f"Took {from_manifest} clip durations from the precompute manifest")
+        skipped = {}
+        self.files_to_examine = []
+        for f, duration, _, _ in clips:
+            duration = durations.get(f, duration)
+            if duration is None:
+                reason = 'unreadable'
+            elif duration == 0:
+                reason = 'empty'
+            elif duration != CLIP_DURATION:
+                reason = 'wrong_duration'
+            else:
+                self.files_to_examine.append(f)
+                continue
+            skipped[reason] = skipped.get(reason, 0) + 1
+        if skipped:
+            summary = ", ".join(f"{reason}: {count}" for reason, count in sorted(skipped.items()))
+            self.log_message(f"Screening skipped {sum(skipped.values())} of {len(clips)} files ({summary})")
+        self.log_message(f"Files to examine: {len(self.files_to_examine)}")
+        if self.files_to_examine and (self.order_by_score.get() or self.auto_route_noise.get()):
+            known = {f: (score, noise_confidence) for f, _, score, noise_confidence in clips if score is not None}
+            self.start_triage(species, known)
+        else:
+            self.group_or_begin(species)
+
+    def start_source_examination(self):
+        from clip_loader import CLIP_DURATION
+        from clip_sources import clip_key
+
+        species = self.current_species.get()
+        self.log_message(f"Starting examination for species {species} in {self.source.path}")
+        decisions = self.labels.decisions()
+        names = [n for n in self.source.clip_names(species) if clip_key(species, n) not in decisions]
+        if not names:
+            messagebox.showinfo("No Files", f"No unlabeled clips for {species} in:\n{self.source.path}")
+            return
+        # Segment indexes know every duration up front; archive clips are checked once decoded
+        durations = {n: self.source.duration(clip_key(species, n)) for n in names}
+        self.files_to_examine = [n for n in names if durations[n] is None or durations[n] == CLIP_DURATION]
+        if len(self.files_to_examine) < len(names):
+            self.log_message(f"Screening skipped {len(names) - len(self.files_to_examine)} of {len(names)} clips (wrong_duration)")
+        if self.order_by_score.get() or self.auto_route_noise.get():
+            self.log_message("Triage works on species folders only; clip sources are reviewed in name order")
+        if self.group_duplicates.get():
+            self.log_message("Near-duplicate grouping works on species folders only; every clip in a source is shown")
+        self.log_message(f"Files to examine: {len(self.files_to_examine)}")
+        self.begin_examination()
+
+    def clip_path(self, name):
+        # Species folder path, or the clip's key when reviewing a packed source
+        if self.source:
+            from clip_sources import clip_key
+            return clip_key(self.current_species.get(), name)
+        return os.path.normpath(os.path.join(self.main_folder, self.current_species.get(), name))
+
+    def begin_examination(self):
+        from clip_loader import CLIP_DURATION
+
+        if self.files_to_examine and self.shared_review.get() and not self.source:
+            self.open_leases()
+            # The queue is now only what this reviewer holds leases for
+            self.unclaimed = self.files_to_examine
+            self.files_to_examine = []
+            self.claim_more()
+            if not self.files_to_examine and self.unclaimed:
+                self.log_message(f"All {len(self.unclaimed)} remaining clips are claimed by other reviewers")
+                self.enable_start()
+                messagebox.showinfo("No Files", "Every remaining clip in this folder is being reviewed by someone else.")
+                return
+        else:
+            self.files_to_examine = self.route_likely_noise(self.current_species.get(), self.files_to_examine)
         if self.files_to_examine:
-            self.current_file = os.path.normpath(os.path.join(self.main_folder, self.current_species.get(), self.files_to_examine.pop(0)))
-            self.log_message(f"Examining file: {self.current_file}")
+            self.start_button.config(state=tk.DISABLED)
+            self.show_grid_canvas(self.grid_mode.get())
+            if self.grid_mode.get():
+                self.show_next_page()
+            else:
+                self.examine_next_file()
+        else:
+            self.enable_start()
+            species_folder = os.path.normpath(os.path.join(self.main_folder, self.current_species.get()))
+            self.log_message(f"No {CLIP_DURATION:g} second clips found in the folder: {species_folder}")
+            messagebox.showinfo("No Files", f"No {CLIP_DURATION:g} second WAV or MP3 clips found in the folder:\n{species_folder}")
+
+    def open_leases(self):
+        from clip_leases import ClipLeases
+
+        if self.leases and self.leases.main_folder == self.main_folder:
+            return
+        self.close_leases()
+        self.leases = ClipLeases(self.main_folder)
+        self.log_message(f"Shared review as {self.leases.reviewer}")
+
+    def close_leases(self):
+        if self.leases:
+            self.leases.close()
+            self.leases = None
+        self.unclaimed = []
+
+    def claim_more(self, wanted=None):
+        # Keeps a batch of leased clips ahead of the prefetcher (or the next grid page)
+        wanted = wanted or self.prefetch_depth + 1
+        if not self.leases or not self.unclaimed or len(self.files_to_examine) >= wanted:
+            return
+        species = self.current_species.get()
+        # Claimed clips triage marked as noise are routed right away, so claim again until enough are left
+        while self.unclaimed and len(self.files_to_examine) < wanted:
             try:
-                if not os.path.exists(self.current_file):
-                    raise FileNotFoundError(f"File not found: {self.current_file}")
-                self.log_message(f"Attempting to load file: {self.current_file}")
-                self.log_message(f"File exists: {os.path.exists(self.current_file)}")
-                self.log_message(f"File size: {os.path.getsize(self.current_file)} bytes")
-                with sf.SoundFile(self.current_file) as sound_file:
-                    y = sound_file.read(dtype="float32")
-                    sr = sound_file.samplerate
-
-                duration = len(y) / sr
-                if len(y) == 0:
-                    self.log_message(f"Warning: Empty audio file: {self.current_file}")
-                    self.examine_next_file()
-                    return
-
-                if duration != 3.0:
-                    self.log_message(f"Skipping file {self.current_file} as it is not exactly 3 seconds long (actual duration: {duration:.2f} seconds)")
-                    self.examine_next_file()
-                    return
-                
-                self.display_spectrogram(y, sr)
-                self.load_and_play_audio(y, sr)
-                
+                claimed, gone = self.leases.claim(species, self.unclaimed, max(self.leases.batch_size, wanted - len(self.files_to_examine)))
+            except OSError as e:
+                self.log_message(f"Unable to claim clips: {e}", logging.WARNING)
+                return
+            taken = set(claimed) | set(gone)
+            self.unclaimed = [f for f in self.unclaimed if f not in taken]
+            self.files_to_examine.extend(self.route_likely_noise(species, claimed))
+            self.log_message(f"Claimed {len(claimed)} clips, {len(self.unclaimed)} left unclaimed", logging.DEBUG)
+            if not claimed:
+                break
+
+    def route_likely_noise(self, species, names):
+        # Returns the names left to review
+        routed = [f for f in names if f in self.likely_noise]
+        if not routed:
+            return names
+        noise_folder = os.path.normpath(os.path.join(self.main_folder, self.noise_folder))
+        members = []
+        for f in routed:
+            # Journaled like a manual decision, so Undo brings the clip back
+            src = os.path.normpath(os.path.join(self.main_folder, species, f))
+            self.journal.record(src, os.path.join(noise_folder, f), "noise", species)
+            if self.leases:
+                self.leases.complete(species, f)
+            self.likely_noise.discard(f)
+            # Near-duplicates it stood for were not scored as noise; they are reviewed on their own
+            members.extend(self.duplicates.pop(f, []))
+        # One Undo per routed clip, in journal order with the decisions around it
+        self.decided_groups.extend([1] for _ in routed)
+        self.log_message(f"Auto-routed {len(routed)} clips to noise (confidence >= {self.auto_noise_threshold:.2f})")
+        routed = set(routed)
+        left = [f for f in names if f not in routed]
+        if self.leases:
+            # Not leased yet; claim_more takes them next
+            self.unclaimed[:0] = members
+            return left
+        return left + members
+
+    def enable_start(self):
+        # A second Start while a background job runs would start another poll
+        # loop over the same result
+        if self.analysis_ready and self.background_job is None:
+            self.start_button.config(state=tk.NORMAL)
+
+    def finish_background_job(self):
+        # Returns the folder the job ran on
+        folder = self.background_job[0]
+        self.background_job = None
+        self.start_button.config(text="Start Examination")
+        return folder
+
+    def job_still_current(self, folder, species):
+        if folder == self.main_folder and species == self.current_species.get():
+            return True
+        # Changed while the job ran; that queue has already been dropped
+        self.enable_start()
+        return False
+
+    def start_triage(self, species, known):
+        # Scores persist in the catalog; only clips never scored before are read here,
+        # on a background thread so the window stays responsive
+        species_folder = os.path.join(self.main_folder, species)
+        missing = [os.path.join(species_folder, f) for f in self.files_to_examine if f not in known]
+        self.triage_result = None
+        self.background_job = (self.main_folder, species)
+        self.start_button.config(text=f"Scoring {len(missing)} clips...", state=tk.DISABLED)
+        self.log_message(f"Scoring {len(missing)} clips ({len(known)} scores cached)")
+
+        def run():
+            from triage import score_clips
+            try:
+                self.triage_result = score_clips(missing, self.spectrogram_cache)
+            except Exception as e:
+                self.triage_result = e
+
+        threading.Thread(target=run, name="clip-triage", daemon=True).start()
+        self.master.after(100, self.poll_triage, species, known)
+
+    def poll_triage(self, species, known):
+        if self.triage_result is None:
+            self.master.after(100, self.poll_triage, species, known)
+            return
+        folder = self.finish_background_job()
+        if isinstance(self.triage_result, Exception):
+            self.log_error(f"Error scoring clips: {self.triage_result}")
+            if self.job_still_current(folder, species):
+                self.group_or_begin(species)
+            return
+        scores = {os.path.basename(path): result for path, result in self.triage_result.items()}
+        if folder == self.main_folder:
+            self.catalog.set_scores(species, scores)
+        if not self.job_still_current(folder, species):
+            return
+        scores.update(known)
+
+        if self.auto_route_noise.get():
+            self.likely_noise = {f for f in self.files_to_examine if f in scores and scores[f][1] >= self.auto_noise_threshold}
+            if not self.shared_review.get():
+                # In shared review another reviewer may hold any of these; they
+                # are routed as this reviewer claims them (claim_more)
+                self.files_to_examine = self.route_likely_noise(species, self.files_to_examine)
+        if self.order_by_score.get():
+            # Most bird-like first; clips that could not be scored go last
+            self.files_to_examine.sort(key=lambda f: -scores[f][0] if f in scores else 1.0)
+        self.group_or_begin(species)
+
+    def group_or_begin(self, species):
+        if self.group_duplicates.get() and self.files_to_examine:
+            self.start_grouping(species)
+        else:
+            self.begin_examination()
+
+    def start_grouping(self, species):
+        # Fingerprints persist in the catalog and the index stays in memory between
+        # examinations, so only clips that arrived since are read and added
+        from fingerprint_index import FingerprintIndex
+
+        folder_key = (self.main_folder, species)
+        if self.fingerprint_index is None or self.fingerprint_index[0] != folder_key:
+            self.fingerprint_index = (folder_key, FingerprintIndex(self.duplicate_distance))
+        index = self.fingerprint_index[1]
+        known = self.catalog.fingerprints(species)
+        species_folder = os.path.join(self.main_folder, species)
+        queue = list(self.files_to_examine)
+        missing = [os.path.join(species_folder, f) for f in queue if f not in known]
+        self.grouping_result = None
+        self.background_job = (self.main_folder, species)
+        self.start_button.config(text=f"Fingerprinting {len(missing)} clips...", state=tk.DISABLED)
+        self.log_message(f"Fingerprinting {len(missing)} clips ({len(known)} fingerprints cached)")
+
+        def run():
+            from fingerprint_index import fingerprint_clips
+            try:
+                fingerprints = {os.path.basename(path): signature for path, signature in
+                                fingerprint_clips(missing, self.spectrogram_cache).items()}
+                for name in index.keys():
+                    if name not in known:
+                        # Decided and moved out of the species folder since
+                        index.remove(name)
+                for name, signature in list(known.items()) + list(fingerprints.items()):
+                    index.add(name, signature)
+                self.grouping_result = (fingerprints, index.group(queue))
+            except Exception as e:
+                self.grouping_result = e
+
+        threading.Thread(target=run, name="clip-fingerprint", daemon=True).start()
+        self.master.after(100, self.poll_grouping, species)
+
+    def poll_grouping(self, species):
+        if self.grouping_result is None:
+            self.master.after(100, self.poll_grouping, species)
+            return
+        folder = self.finish_background_job()
+        if isinstance(self.grouping_result, Exception):
+            self.log_error(f"Error grouping near-duplicates: {self.grouping_result}")
+            if self.job_still_current(folder, species):
+                self.begin_examination()
+            return
+        fingerprints, groups = self.grouping_result
+        if folder == self.main_folder:
+            self.catalog.set_fingerprints(species, fingerprints)
+        if not self.job_still_current(folder, species):
+            return
+        self.files_to_examine = [group[0] for group in groups]
+        self.duplicates = {group[0]: group[1:] for group in groups if len(group) > 1}
+        grouped = sum(len(members) for members in self.duplicates.values())
+        self.log_message(f"Grouped {grouped} near-duplicates under {len(self.duplicates)} clips; "
+                         f"{len(self.files_to_examine)} clips to examine")
+        self.begin_examination()
+
+    def examine_next_file(self):
+        from clip_loader import CLIP_DURATION
+
+        self.log_message(f"Entering examine_next_file. Files to examine: {len(self.files_to_examine)}", logging.DEBUG)
+        # Header screening already dropped most bad clips; anything that still fails
+        # after decoding is skipped here in a loop rather than by recursing.
+        skipped = 0
+        self.claim_more()
+        while self.files_to_examine:
+            self.current_file = self.clip_path(self.files_to_examine.pop(0))
+            self.claim_more()
+            self.log_message(f"Examining file: {self.current_file}", logging.DEBUG)
+            try:
+                self.log_message(f"Prefetched: {self.prefetcher.is_ready(self.current_file)}", logging.DEBUG)
+                clip = self.prefetcher.get(self.current_file, self.upcoming_paths())
+                if not clip.is_reviewable:
+                    skipped += 1
+                    if self.leases:
+                        # Keep the lease so other reviewers don't retry it
+                        self.leases.complete(self.current_species.get(), os.path.basename(self.current_file))
+                    continue
+
+                if skipped:
+                    self.log_message(f"Skipped {skipped} files that were empty or not exactly {CLIP_DURATION:g} seconds long")
+                self.display_spectrogram(clip.y, clip.sr, clip.S_db)
+                self.note_displayed()
+                self.load_and_play_audio(clip.y, clip.sr)
+                return
             except Exception as e:
                 error_msg = f"Error processing file {self.current_file}: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-                self.log_message(error_msg)
                 self.log_error(error_msg)
-                self.examine_next_file()
-        else:
-            self.log_message("No more files to examine. Entering completion block.")
-            detail_msg = "All files have been examined."
-            self.log_message(detail_msg)
-            messagebox.showinfo("Examination Complete", detail_msg)
-            self.update_progress_file()
+
+        if skipped:
+            self.log_message(f"Skipped {skipped} files that were empty or not exactly {CLIP_DURATION:g} seconds long")
+        self.finish_examination()
+
+    def finish_examination(self):
+        self.log_message("No more files to examine. Entering completion block.")
+        detail_msg = "All files have been examined."
+        self.log_message(detail_msg)
+        messagebox.showinfo("Examination Complete", detail_msg)
+        self.update_progress_file()
+        self.reset_examination()
+
+    def take_page(self):
+        # The next rows x cols clips come off the queue together
+        size = self.grid_rows * self.grid_cols
+        self.claim_more(size + 1)
+        names = self.files_to_examine[:size]
+        del self.files_to_examine[:size]
+        return names
+
+    def load_page(self, names):
+        from clip_loader import load_clips
+
+        cache = None if self.source else self.spectrogram_cache
+        return names, load_clips([self.clip_path(f) for f in names], cache, self.metrics, self.source)
+
+    def prefetch_page(self):
+        names = self.take_page()
+        if not names:
+            return
+        if self.page_executor is None:
+            self.page_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clip-page")
+        self.next_page = (names, self.page_executor.submit(self.load_page, names))
+
+    def show_next_page(self):
+        from clip_loader import CLIP_DURATION
+        from audio_decode import MemoryBudgetExceeded
+
+        skipped = 0
+        reviewable = []
+        while not reviewable:
+            if self.next_page is None:
+                self.prefetch_page()
+            if self.next_page is None:
+                break
+            names, future = self.next_page
+            self.next_page = None
+            try:
+                clips = None
+                if future.done() and not future.cancelled():
+                    try:
+                        _, clips = future.result()
+                    except MemoryBudgetExceeded:
+                        pass
+                else:
+                    # Still decoding, or waiting for room in the decode budget;
+                    # the Tk thread never waits on it, this page is needed now
+                    future.cancel()
+                if clips is None:
+                    _, clips = self.load_page(names)
+            except Exception as e:
+                self.log_error(f"Error loading clips {', '.join(names)}: {str(e)}\n\nTraceback:\n{traceback.format_exc()}")
+                clips = [None] * len(names)
+            # Decode the following page while this one is being reviewed
+            self.prefetch_page()
+            for name, clip in zip(names, clips):
+                if clip is not None and clip.is_reviewable:
+                    reviewable.append(clip)
+                    continue
+                skipped += 1
+                if self.leases:
+                    self.leases.complete(self.current_species.get(), name)
+
+        if skipped:
+            self.log_message(f"Skipped {skipped} files that were empty or not exactly {CLIP_DURATION:g} seconds long")
+        if not reviewable:
+            self.finish_examination()
+            return
+        self.page = reviewable
+        self.page_selected = set()
+        self.page_decided = {}
+        self.hover_tile = None
+        self.current_file = ""
+        self.player.stop()
+        start = time.perf_counter()
+        self.grid_renderer.set_page([(clip.S_db, clip.sr) for clip in self.page])
+        self.render_page()
+        self.metrics.since("render", start)
+        self.note_displayed()
+
+    def render_page(self):
+        members = sum(len(self.duplicates.get(os.path.basename(clip.path), ())) for clip in self.page)
+        title = (f"{len(self.page_decided)}/{len(self.page)} decided, {len(self.page_selected)} selected"
+                 f"{f' (+{members} near-duplicates)' if members else ''}    "
+                 f"click: select, Space/Left/Right: approve/false positive/noise for the selection (or the rest of the page)")
+        self.grid_renderer.show(self.page_selected, self.page_decided, title)
+
+    def note_displayed(self):
+        if self.decision_started is not None:
+            # Idle callbacks run after Tk has painted the new image
+            self.master.after_idle(self.metrics.since, "decision_to_display", self.decision_started)
+            self.decision_started = None
+
+    def clear_page(self):
+        # Returns the names of page clips still undecided, for requeueing
+        names = [os.path.basename(clip.path) for index, clip in enumerate(self.page) if index not in self.page_decided]
+        if self.next_page is not None:
+            next_names, future = self.next_page
+            future.cancel()
+            names.extend(next_names)
+            self.next_page = None
+        self.page = []
+        self.page_selected = set()
+        self.page_decided = {}
+        self.hover_tile = None
+        if self.grid_renderer is not None:
+            self.grid_renderer.clear()
+        return names
+
+    def on_grid_click(self, event):
+        index = self.grid_renderer.tile_at(event.xdata, event.ydata) if event.inaxes else None
+        if index is None or index >= len(self.page) or index in self.page_decided:
+            return
+        if event.button == 1:
+            self.page_selected ^= {index}
+            self.render_page()
+            return
+        # Middle and right click decide just that tile, like on the single-clip view
+        self.page_selected = {index}
+        self.decide_tiles("false_positive" if event.button == 2 else "noise")
+
+    def on_grid_hover(self, event):
+        index = self.grid_renderer.tile_at(event.xdata, event.ydata) if event.inaxes else None
+        if index is not None and index >= len(self.page):
+            index = None
+        if index == self.hover_tile:
+            return
+        self.hover_tile = index
+        if index is not None:
+            clip = self.page[index]
+            self.current_file = clip.path
+            self.load_and_play_audio(clip.y, clip.sr)
+
+    def decide_tiles(self, decision):
+        # Applies to the selected tiles, or to every undecided tile when nothing is selected
+        targets = sorted(self.page_selected) or [i for i in range(len(self.page)) if i not in self.page_decided]
+        self.decision_started = time.perf_counter()
+        action = []
+        stop_message = None
+        for index in targets:
+            if index in self.page_decided:
+                continue
+            path = self.page[index].path
+            try:
+                stop_message = self.decide_group(path, decision, action)
+            except Exception as e:
+                error_msg = f"Error processing decision for file:\n{path}\n\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+                self.log_message(error_msg, logging.ERROR)
+                messagebox.showerror("Error", error_msg)
+                continue
+            self.page_decided[index] = decision
+            if stop_message:
+                break
+        # One key press is one Undo, however many tiles it decided
+        if action:
+            self.decided_groups.append(action)
+        if stop_message:
+            messagebox.showinfo("Process Complete", stop_message)
             self.reset_examination()
+            self.update_approved_count()
+            return
+        self.page_selected = set()
+        if len(self.page_decided) == len(self.page):
+            self.show_next_page()
+            return
+        self.render_page()
+        self.note_displayed()
+
+    def upcoming_paths(self):
+        return [self.clip_path(f) for f in self.files_to_examine[:self.prefetch_depth]]
 
     def load_and_play_audio(self, y, sr):
         try:
-            sd.stop()  # Stop any currently playing audio
-            sd.play(y, sr)
+            # Swaps the buffer on the already-open stream; stops whatever was playing
+            self.player.play(self.current_file, y, sr)
+            self.log_message(f"Playback latency: {self.player.latency_stats()}", logging.DEBUG)
         except Exception as e:
-            self.log_message(f"Error playing audio: {e}")
+            self.log_message(f"Error playing audio: {e}", logging.ERROR)
             messagebox.showwarning("Audio Playback Error", "Unable to play audio. The spectrogram will still be displayed.")
 
-    def display_spectrogram(self, y, sr):
-        self.ax.clear()
-        S = np.abs(librosa.stft(y))
-        librosa.display.specshow(librosa.amplitude_to_db(S, ref=np.max), y_axis='hz', x_axis='time', ax=self.ax, sr=sr, cmap='viridis')
-        plt.ylim(0, 15000)
-        self.ax.set_title(os.path.basename(self.current_file), color='#ECF0F1')
-        self.ax.set_xlabel('Time', color='#ECF0F1')
-        self.ax.set_ylabel('Frequency', color='#ECF0F1')
-        self.ax.tick_params(colors='#ECF0F1')
-        self.canvas.draw()
+    def display_spectrogram(self, y, sr, S_db=None):
+        from clip_loader import cached_spectrogram_db
+
+        if S_db is None:
+            cache = None if self.source else self.spectrogram_cache
+            S_db = cached_spectrogram_db(self.current_file, y, cache, self.metrics)
+        start = time.perf_counter()
+        title = os.path.basename(self.current_file)
+        members = len(self.duplicates.get(title, ()))
+        if members:
+            title += f"  (+{members} near-duplicate{'s' if members > 1 else ''})"
+        self.renderer.show(S_db, sr, title)
+        self.metrics.since("render", start)
     
+    def decision_folder(self, decision):
+        if decision == "approve":
+            return os.path.normpath(os.path.join(self.main_folder, self.filtered_species_folder, self.current_species.get()))
+        if decision == "noise":
+            return os.path.normpath(os.path.join(self.main_folder, self.noise_folder))
+        if decision == "false_positive":
+            return os.path.normpath(os.path.join(self.main_folder, self.false_positive_folder))
+        return None
+
+    def record_decision(self, path, decision):
+        # Returns False when another reviewer took the last approval slot
+        species = self.current_species.get()
+        if self.source:
+            # Nothing is moved; export_labels writes the folders later
+            self.labels.record(path, decision, species)
+            return True
+        name = os.path.basename(path)
+        if self.leases and decision == "approve" and not self.leases.reserve_approval(species, name, self.max_seg_num):
+            return False
+        target_folder = self.decision_folder(decision)
+        self.log_message(f"Target folder: {target_folder}", logging.DEBUG)
+        target_file = os.path.normpath(os.path.join(target_folder, name))
+        self.log_message(f"Queueing move from {path} to {target_file}", logging.DEBUG)
+
+        self.journal.record(path, target_file, decision, species)
+        if self.leases:
+            self.leases.complete(species, name)
+        return True
+
+    def count_approval(self):
+        # Returns True once the approved folder is full
+        if self.leases:
+            # Includes approvals by every other reviewer
+            self.approved_count.set(self.leases.approved_count(self.current_species.get()))
+        else:
+            self.approved_count.set(self.approved_count.get() + 1)
+        self.update_approved_count_label()
+        return self.approved_count.get() >= self.max_seg_num
+
+    def decide_group(self, path, decision, action):
+        # Records the decision for the clip and every near-duplicate it stands for,
+        # and appends the number of history entries written to `action`.
+        # Returns the message to stop with once the approved folder is full.
+        species = self.current_species.get()
+        members = self.duplicates.pop(os.path.basename(path), [])
+        if members and self.leases:
+            # Near-duplicates are not in the shared queue; take them now, unless
+            # another reviewer reached them first as representatives of their own
+            members, _ = self.leases.claim(species, members, len(members))
+        elif members:
+            members = [name for name in members if os.path.exists(self.clip_path(name))]
+        recorded = 0
+        try:
+            for clip_path in [path] + [self.clip_path(name) for name in members]:
+                if not self.record_decision(clip_path, decision):
+                    return f"Reviewers together reached {self.max_seg_num} approved files. Stopping examination."
+                recorded += 1
+                if decision == "approve" and self.count_approval():
+                    return f"Reached {self.max_seg_num} approved files. Stopping examination."
+        finally:
+            if recorded:
+                action.append(recorded)
+        if members:
+            self.log_message(f"Applied {decision} to {len(members)} near-duplicates of {os.path.basename(path)}")
+        return None
+
     def process_decision(self, decision):
-        self.log_message(f"Processing decision: {decision}")
+        self.log_message(f"Processing decision: {decision}", logging.DEBUG)
+        if self.decision_folder(decision) is None:
+            self.log_message(f"Unknown decision: {decision}", logging.WARNING)
+            return
+        if self.page:
+            self.decide_tiles(decision)
+            return
         if not self.current_file:
-            self.log_message("No current file to process")
+            self.log_message("No current file to process", logging.DEBUG)
             return
+        self.decision_started = time.perf_counter()
+        action = []
         try:
-            if decision == "approve":
-                target_folder = os.path.normpath(os.path.join(self.main_folder, self.filtered_species_folder, self.current_species.get()))
-            elif decision == "noise":
-                target_folder = os.path.normpath(os.path.join(self.main_folder, self.noise_folder))
-            elif decision == "false_positive":
-                target_folder = os.path.normpath(os.path.join(self.main_folder, self.false_positive_folder))
-            else:
-                self.log_message(f"Unknown decision: {decision}")
+            try:
+                stop_message = self.decide_group(self.current_file, decision, action)
+            finally:
+                if action:
+                    self.decided_groups.append(action)
+            if stop_message:
+                messagebox.showinfo("Process Complete", stop_message)
+                self.reset_examination()
+                self.update_approved_count()
                 return
-
-            self.log_message(f"Target folder: {target_folder}")
-            os.makedirs(target_folder, exist_ok=True)
-            target_file = os.path.normpath(os.path.join(target_folder, os.path.basename(self.current_file)))
-            self.log_message(f"Moving file from {self.current_file} to {target_file}")
-            
-            shutil.move(self.current_file, target_file)
-            self.log_message(f"File successfully moved to: {target_file}")
-            
-            if decision == "approve":
-                self.approved_count.set(self.approved_count.get() + 1)
-                self.update_approved_count_label()
-                if self.approved_count.get() >= self.max_seg_num:
-                    messagebox.showinfo("Process Complete", f"Reached {self.max_seg_num} approved files. Stopping examination.")
-                    self.reset_examination()
-                    return
             self.examine_next_file()
         except Exception as e:
             error_msg = f"Error processing decision for file:\n{self.current_file}\n\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-            self.log_message(error_msg)
+            self.log_message(error_msg, logging.ERROR)
             messagebox.showerror("Error", error_msg)
             self.examine_next_file()
 
+    def undo_decision(self, event=None):
+        history = self.labels if self.source else self.journal
+        if not history or not self.analysis_ready:
+            return
+        try:
+            action = self.decided_groups.pop() if self.decided_groups else [1]
+            reverted = history.undo(sum(action))
+        except Exception as e:
+            error_msg = f"Error undoing last decision:\n\nError: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+            self.log_message(error_msg, logging.ERROR)
+            messagebox.showerror("Error", error_msg)
+            return
+        if not reverted:
+            self.log_message("Nothing to undo")
+            return
+        # Oldest first, split back into groups; each starts with the clip that was on screen
+        entries = list(reversed(reverted))
+        requeue = []
+        for size in action:
+            group = [e for e in entries[:size] if e.species == self.current_species.get()]
+            entries = entries[size:]
+            if not group:
+                continue
+            if len(group) > 1:
+                self.duplicates[os.path.basename(group[0].src)] = [os.path.basename(e.src) for e in group[1:]]
+            requeue.append(os.path.basename(group[0].src))
+        for entry in reverted:
+            self.log_message(f"Undid {entry.decision} for {entry.src}")
+            if self.leases:
+                name = os.path.basename(entry.src)
+                if entry.decision == "approve":
+                    self.leases.release_approval(entry.species, name)
+                if entry.species == self.current_species.get():
+                    self.leases.reopen(entry.species, name)
+        if self.page:
+            # Decisions on the page being shown are simply taken back on screen. Journal
+            # entries hold paths relative to the main folder, so tiles are matched by name.
+            on_page = {os.path.basename(clip.path): index for index, clip in enumerate(self.page)}
+            for name in requeue:
+                if name in on_page:
+                    self.page_decided.pop(on_page[name], None)
+            requeue = [name for name in requeue if name not in on_page]
+            if not requeue:
+                self.update_approved_count()
+                self.render_page()
+                return
+            # An earlier page: its clip comes back first, followed by everything not yet decided
+            self.files_to_examine[:0] = requeue + self.clear_page()
+            self.update_approved_count()
+            self.show_next_page()
+            return
+        if not requeue:
+            self.update_approved_count()
+            return
+        # Put the clip on screen back in the queue behind the one being re-examined
+        self.prefetcher.cancel()
+        if self.current_file:
+            self.files_to_examine.insert(0, os.path.basename(self.current_file))
+        self.files_to_examine[:0] = requeue
+        self.update_approved_count()
+        self.start_button.config(state=tk.DISABLED)
+        self.examine_next_file()
+
     def update_progress_file(self):
-        progress_file_path = os.path.normpath(os.path.join(self.main_folder, self.progress_file))
+        base_folder = os.path.dirname(os.path.abspath(self.source.path)) if self.source else self.main_folder
+        progress_file_path = os.path.normpath(os.path.join(base_folder, self.progress_file))
         try:
             with open(progress_file_path, 'a') as f:
                 f.write(f"{self.current_species.get()}\n")
         except Exception as e:
-            self.log_message(f"Error updating progress file: {e}")
+            self.log_message(f"Error updating progress file: {e}", logging.ERROR)
             messagebox.showerror("Error", f"Error updating progress file:\n{progress_file_path}\n\nError: {str(e)}")
     
     def log_error(self, error_msg):
-        log_file_path = os.path.join(tempfile.gettempdir(), 'bird_sound_examiner_error_log.txt')
-        with open(log_file_path, "a") as log_file:
-            log_file.write(f"{error_msg}\n")
-        self.log_message(f"Error logged to {log_file_path}")
-        messagebox.showerror("Error", f"An error occurred. Error details:\n\n{error_msg}\n\nThis error has been logged to:\n{log_file_path}")
+        # ERROR records also land in the separate error log via the same queue
+        self.log_message(error_msg, logging.ERROR)
+        messagebox.showerror("Error", f"An error occurred. Error details:\n\n{error_msg}\n\nThis error has been logged to:\n{self.logging.error_log_file}")
     
-    def log_message(self, message):
-        log_entry = f"{message}\n"
-        if self.log_file:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+    def log_message(self, message, level=logging.INFO):
+        self.logger.log(level, message)
 
     def play_again(self):
+        import soundfile as sf
+        from audio_decode import decode_mono
+
         if self.current_file:
+            # The current clip's samples are still in memory; just rewind
+            if self.player.replay(self.current_file):
+                return
             try:
-                y, sr = sf.read(self.current_file, dtype="float32")
+                if self.source:
+                    y, sr = self.source.read(self.current_file)
+                else:
+                    y = self.spectrogram_cache.get_pcm(self.current_file) if self.spectrogram_cache else None
+                    if y is not None:
+                        sr = sf.info(self.current_file).samplerate
+                    else:
+                        y, sr = decode_mono(self.current_file)
                 self.load_and_play_audio(y, sr)
             except Exception as e:
-                self.log_message(f"Error playing audio again: {e}")
+                self.log_message(f"Error playing audio again: {e}", logging.ERROR)
                 messagebox.showwarning("Audio Playback Error", "Unable to play audio again.")
 
     def update_approved_count(self):
-        if self.main_folder and self.current_species.get():
-            species_folder = os.path.join(self.main_folder, self.filtered_species_folder, self.current_species.get())
-            if os.path.exists(species_folder):
-                count = len([f for f in os.listdir(species_folder) if f.lower().endswith(('.wav', '.mp3'))])
-                self.approved_count.set(count)
-            else:
-                self.approved_count.set(0)
+        if self.source and self.current_species.get():
+            self.approved_count.set(self.labels.count("approve", self.current_species.get()))
+        elif self.leases and self.current_species.get():
+            self.approved_count.set(self.leases.approved_count(self.current_species.get()))
+        elif self.main_folder and self.current_species.get():
+            # Only rescans filtered_species_files/<species> if its mtime changed
+            self.catalog.refresh(self.species_hints, only_species=self.current_species.get())
+            count = self.catalog.count(self.current_species.get(), APPROVED)
+            if self.journal:
+                count += self.journal.pending_count("approve", self.current_species.get())
+            self.approved_count.set(count)
         else:
             self.approved_count.set(0)
         self.update_approved_count_label()
@@ -451,6 +1587,13 @@ class BirdSoundApp:
 
 # Main execution
 if __name__ == "__main__":
+    if HEADLESS:
+        from batch_precompute import main
+        sys.exit(main(sys.argv[2:]))
     root = tk.Tk()
     app = BirdSoundApp(root)
-    root.mainloop()
+    sys.stdout = LoggingPrint(app.logger)
+    try:
+        root.mainloop()
+    finally:
+        sys.stdout = sys.stdout.terminal
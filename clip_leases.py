@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import socket
+import threading
+
+from folder_catalog import FILTERED_SPECIES_FOLDER
+
+
+# Same hidden folder batch_precompute writes to; species scans skip dot-folders
+SHARED_DIR = ".bird_sound_examiner"
+LEASE_DIR = "leases"
+APPROVAL_DIR = "approvals"
+LEASE_SUFFIX = ".lease"
+TAKEOVER_SUFFIX = ".takeover"
+SLOT_PREFIX = "slot_"
+DEFAULT_LEASE_SECONDS = 300.0
+
+
+def reviewer_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def create_exclusive(path, payload):
+    # O_EXCL creation is atomic on local disks and on SMB/NFS shares, so exactly
+    # one reviewer wins each lease or slot
+    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(payload))
+
+
+# Lets several BirdSoundApp instances (on one machine or many) review the same
+# species folder. A reviewer only examines clips it holds a lease file for;
+# leases are renewed by heartbeat and a lease untouched for lease_seconds
+# (a crashed client) can be taken over. Approvals additionally take one of
+# max_seg_num numbered slot files, so the shared total can never overshoot.
+class ClipLeases:
+    def __init__(self, main_folder, reviewer=None, lease_seconds=DEFAULT_LEASE_SECONDS, batch_size=20):
+        self.main_folder = main_folder
+        self.reviewer = reviewer or reviewer_id()
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.root = os.path.join(main_folder, SHARED_DIR)
+        self.lock = threading.Lock()
+        # (species, name) -> lease path, for clips claimed and not yet released
+        self.held = {}
+        # Decided clips keep their lease until the mover has taken them out of the folder
+        self.completed = set()
+        self.slots = {}
+        self.slot_clips = {}
+        self.last_renewal = time.time()
+
+    def _lease_path(self, species, name):
+        return os.path.join(self.root, LEASE_DIR, species, name + LEASE_SUFFIX)
+
+    def _approval_dir(self, species):
+        return os.path.join(self.root, APPROVAL_DIR, species)
+
+    def _clip_path(self, species, name):
+        return os.path.join(self.main_folder, species, name)
+
+    def _try_claim(self, species, name):
+        lease_path = self._lease_path(species, name)
+        payload = {"reviewer": self.reviewer, "time": time.time()}
+        for _ in range(2):
+            try:
+                create_exclusive(lease_path, payload)
+                return lease_path
+            except FileExistsError:
+                pass
+            try:
+                with open(lease_path, 'rb') as f:
+                    content = f.read()
+                    mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if time.time() - mtime_ns / 1e9 < self.lease_seconds:
+                return None
+            if not self._take_over(lease_path, content, mtime_ns):
+                return None
+        return None
+
+    def _take_over(self, lease_path, content, mtime_ns):
+        # Expired. Whoever removes it must be sure it is still the lease it saw
+        # expire: a stat-then-remove could delete a fresh lease another reviewer
+        # created in between. So the right to remove this generation (its
+        # content and last renewal) is itself claimed with an exclusive marker
+        # file; only one reviewer can win it, and a lease can't be replaced
+        # without its marker. Markers are left in place, so a reviewer that saw
+        # the old generation long ago can never win it later.
+        generation = hashlib.sha1(content + str(mtime_ns).encode('ascii')).hexdigest()[:16]
+        marker_path = f"{lease_path}.{generation}{TAKEOVER_SUFFIX}"
+        try:
+            create_exclusive(marker_path, {"reviewer": self.reviewer, "time": time.time()})
+        except OSError:
+            return False
+        try:
+            if os.stat(lease_path).st_mtime_ns != mtime_ns:
+                # Renewed after all (its reviewer was only suspended)
+                return False
+            os.remove(lease_path)
+        except OSError:
+            return False
+        # The winner then races fairly with everyone else for the fresh lease
+        return True
+
+    def claim(self, species, names, limit=None):
+        # Returns (claimed, gone): the names claimed, in order, and those no
+        # longer in the species folder. Clips leased by someone else are in neither.
+        os.makedirs(os.path.join(self.root, LEASE_DIR, species), exist_ok=True)
+        limit = self.batch_size if limit is None else limit
+        claimed, gone = [], []
+        for name in names:
+            if len(claimed) >= limit:
+                break
+            with self.lock:
+                if (species, name) in self.held:
+                    claimed.append(name)
+                    continue
+            if not os.path.exists(self._clip_path(species, name)):
+                gone.append(name)
+                continue
+            lease_path = self._try_claim(species, name)
+            if lease_path is not None and not os.path.exists(self._clip_path(species, name)):
+                # Another reviewer moved it and dropped its lease between our
+                # existence check and the claim; leases are only dropped after
+                # the move, so checking again once we hold the lease is enough
+                os.remove(lease_path)
+                gone.append(name)
+                continue
+            if lease_path is not None:
+                with self.lock:
+                    self.held[(species, name)] = lease_path
+                claimed.append(name)
+        return claimed, gone
+
+    def complete(self, species, name):
+        with self.lock:
+            if (species, name) in self.held:
+                self.completed.add((species, name))
+
+    def reopen(self, species, name):
+        # An undone decision puts the clip back in this reviewer's queue
+        with self.lock:
+            self.completed.discard((species, name))
+            if (species, name) in self.held:
+                return True
+        return bool(self.claim(species, [name])[0])
+
+    def release(self, species=None, keep_completed=True):
+        with self.lock:
+            keys = [k for k in self.held if (species is None or k[0] == species)
+                    and not (keep_completed and k in self.completed)]
+            paths = [self.held.pop(k) for k in keys]
+            self.completed.difference_update(keys)
+        for lease_path in paths:
+            try:
+                os.remove(lease_path)
+            except OSError:
+                pass
+
+    def heartbeat(self, force=False):
+        # Called periodically from the UI loop; cheap when nothing is due
+        now = time.time()
+        if not force and now - self.last_renewal < self.lease_seconds / 3:
+            return
+        self.last_renewal = now
+        with self.lock:
+            held = dict(self.held)
+            completed = set(self.completed)
+        for key, lease_path in held.items():
+            if key in completed and not os.path.exists(self._clip_path(*key)):
+                # Moved out of the species folder; nobody can claim it any more
+                with self.lock:
+                    self.held.pop(key, None)
+                    self.completed.discard(key)
+                try:
+                    os.remove(lease_path)
+                except OSError:
+                    pass
+                continue
+            try:
+                os.utime(lease_path)
+            except OSError:
+                pass
+
+    def _read_slots(self, species):
+        slot_dir = self._approval_dir(species)
+        os.makedirs(slot_dir, exist_ok=True)
+        slots = {}
+        known = self.slot_clips.setdefault(species, {})
+        with os.scandir(slot_dir) as it:
+            for entry in it:
+                if not entry.name.startswith(SLOT_PREFIX) or not entry.name[len(SLOT_PREFIX):].isdigit():
+                    continue
+                index = int(entry.name[len(SLOT_PREFIX):])
+                if index not in known:
+                    # Slot files never change once written, so each is read once
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8') as f:
+                            known[index] = json.load(f)["clip"]
+                    except (OSError, ValueError, KeyError):
+                        continue
+                slots[index] = known[index]
+        for index in list(known):
+            if index not in slots:
+                del known[index]
+        return slots
+
+    def _untracked_approved(self, species, slots):
+        # Approved clips from before shared review (or moved in by hand) hold no slot
+        approved_dir = os.path.join(self.main_folder, FILTERED_SPECIES_FOLDER, species)
+        try:
+            with os.scandir(approved_dir) as it:
+                names = {entry.name for entry in it if entry.is_file()}
+        except OSError:
+            return 0
+        return len(names - set(slots.values()))
+
+    def approved_count(self, species):
+        slots = self._read_slots(species)
+        return self._untracked_approved(species, slots) + len(slots)
+
+    def reserve_approval(self, species, name, max_approved):
+        # Returns False once max_approved is reached across all reviewers.
+        # Approvals holding no slot use up the top of the range, so slots
+        # 1..max_approved - untracked are all that is left to hand out.
+        slots = self._read_slots(species)
+        available = max_approved - self._untracked_approved(species, slots)
+        for index in range(1, available + 1):
+            if index in slots:
+                continue
+            slot_path = os.path.join(self._approval_dir(species), f"{SLOT_PREFIX}{index:06d}")
+            try:
+                create_exclusive(slot_path, {"clip": name, "reviewer": self.reviewer, "time": time.time()})
+            except FileExistsError:
+                continue
+            with self.lock:
+                self.slots[(species, name)] = slot_path
+            return True
+        return False
+
+    def release_approval(self, species, name):
+        with self.lock:
+            slot_path = self.slots.pop((species, name), None)
+        if slot_path is not None:
+            try:
+                os.remove(slot_path)
+            except OSError:
+                pass
+
+    def close(self):
+        # Undecided clips go back to the pool. Decided clips the mover has not
+        # taken out of the folder yet keep their lease until it expires, so
+        # nobody reviews them again before the journal is replayed.
+        self.heartbeat(force=True)
+        self.release()
@@ -0,0 +1,243 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+from audio_decode import read_mono, MemoryBudgetExceeded
+from stft_engine import BatchSpectrogramEngine
+
+
+CLIP_DURATION = 3.0
+
+
+class LoadedClip:
+    def __init__(self, path, y, sr, S_db=None, pcm_cached=False):
+        self.path = path
+        self.y = y
+        self.sr = sr
+        self.S_db = S_db
+        # Samples came from the cache, so there is nothing to store back
+        self.pcm_cached = pcm_cached
+
+    @property
+    def duration(self):
+        return len(self.y) / self.sr if self.sr else 0.0
+
+    @property
+    def is_reviewable(self):
+        return len(self.y) > 0 and self.duration == CLIP_DURATION
+
+
+def probe_duration(path):
+    info = sf.info(path)
+    return info.frames / info.samplerate if info.samplerate else 0.0
+
+
+def screen_clip(path):
+    try:
+        duration = probe_duration(path)
+    except Exception:
+        return 'unreadable', None
+    if duration == 0:
+        return 'empty', duration
+    if duration != CLIP_DURATION:
+        return 'wrong_duration', duration
+    return None, duration
+
+
+def screen_clips(paths, max_workers=8):
+    # Header-only reads are I/O bound, so threads overlap the network round trips
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clip-screen") as executor:
+        results = list(executor.map(screen_clip, paths))
+    accepted = [path for path, (reason, _) in zip(paths, results) if reason is None]
+    skipped = {}
+    for reason, _ in results:
+        if reason is not None:
+            skipped[reason] = skipped.get(reason, 0) + 1
+    durations = {path: duration for path, (_, duration) in zip(paths, results) if duration is not None}
+    return accepted, skipped, durations
+
+
+_engines = threading.local()
+
+
+def _engine():
+    # The engine reuses its buffers, so each prefetch/worker thread gets its own
+    if not hasattr(_engines, 'engine'):
+        _engines.engine = BatchSpectrogramEngine()
+    return _engines.engine
+
+
+def librosa_spectrogram_db(y):
+    S = np.abs(librosa.stft(y))
+    return librosa.amplitude_to_db(S, ref=np.max)
+
+
+def compute_spectrogram_db(y):
+    return compute_spectrogram_db_batch([y])[0]
+
+
+def compute_spectrogram_db_batch(clips):
+    # Equal-length mono clips share one vectorized STFT; anything else (e.g.
+    # multichannel arrays) goes through librosa clip by clip
+    return _engine().spectrogram_db_many(clips, fallback=librosa_spectrogram_db)
+
+
+def cached_spectrogram_db(path, y, cache=None, metrics=None):
+    S_db = cache.get_spectrogram(path) if cache is not None else None
+    if S_db is None:
+        start = time.perf_counter()
+        S_db = compute_spectrogram_db(y)
+        if metrics is not None:
+            metrics.since("stft", start)
+        if cache is not None:
+            cache.put_spectrogram(path, S_db)
+    return S_db
+
+
+def warm_up():
+    # librosa loads its submodules lazily; touch it once so a multichannel clip
+    # falling back to it doesn't stall the first time
+    librosa_spectrogram_db(np.zeros(4096, dtype=np.float32))
+    compute_spectrogram_db(np.zeros(4096, dtype=np.float32))
+
+
+def read_audio(path, cache=None, metrics=None, source=None):
+    # Returns (y, sr, pcm_cached)
+    if source is not None:
+        # `path` is a key into a packed source (see clip_sources); the cache is
+        # keyed by file stat, so it is not used for these
+        start = time.perf_counter()
+        y, sr = source.read(path)
+        if metrics is not None:
+            metrics.since("decode", start)
+        return y, sr, False
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    y = cache.get_pcm(path) if cache is not None else None
+    if y is not None:
+        return y, sf.info(path).samplerate, True
+    start = time.perf_counter()
+    with sf.SoundFile(path) as sound_file:
+        if sound_file.frames != round(CLIP_DURATION * sound_file.samplerate):
+            # It fails the duration check whatever it holds; a long recording
+            # dropped into the folder is never decoded to find that out
+            return np.zeros(0, dtype=np.float32), sound_file.samplerate, False
+        y, sr = read_mono(sound_file)
+    if metrics is not None:
+        metrics.since("decode", start)
+    return y, sr, False
+
+
+def load_clip(path, cache=None, metrics=None, source=None):
+    if source is not None:
+        cache = None
+    y, sr, pcm_cached = read_audio(path, cache, metrics, source)
+    clip = LoadedClip(path, y, sr, pcm_cached=pcm_cached)
+    # Only pay for the STFT when the clip will actually be shown
+    if clip.is_reviewable:
+        clip.S_db = cached_spectrogram_db(path, y, cache, metrics)
+        if cache is not None and not pcm_cached:
+            cache.put_pcm(path, y)
+    return clip
+
+
+def load_clips(paths, cache=None, metrics=None, source=None, max_workers=4):
+    # A whole page at once (grid review): decoding is spread over threads and
+    # every spectrogram not already cached comes from one batched STFT.
+    # Unreadable clips come back as None.
+    if source is not None:
+        cache = None
+
+    def read(path):
+        try:
+            y, sr, pcm_cached = read_audio(path, cache, metrics, source)
+            return LoadedClip(path, y, sr, pcm_cached=pcm_cached)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clip-page") as executor:
+        clips = list(executor.map(read, paths))
+    missing = []
+    for clip in clips:
+        if clip is None or not clip.is_reviewable:
+            continue
+        clip.S_db = cache.get_spectrogram(clip.path) if cache is not None else None
+        if clip.S_db is None:
+            missing.append(clip)
+    if missing:
+        start = time.perf_counter()
+        spectrograms = compute_spectrogram_db_batch([clip.y for clip in missing])
+        if metrics is not None:
+            per_clip = (time.perf_counter() - start) / len(missing)
+            for _ in missing:
+                metrics.observe("stft", per_clip)
+        for clip, S_db in zip(missing, spectrograms):
+            clip.S_db = S_db
+            if cache is not None:
+                cache.put_spectrogram(clip.path, S_db)
+                if not clip.pcm_cached:
+                    cache.put_pcm(clip.path, clip.y)
+    return clips
+
+
+class ClipPrefetcher:
+    def __init__(self, depth=3, max_workers=2, cache=None, on_loaded=None, metrics=None, source=None):
+        self.depth = depth
+        self.cache = cache
+        self.metrics = metrics
+        # Packed clip source; paths are then keys into it
+        self.source = source
+        # Called from the worker thread with each reviewable LoadedClip
+        self.on_loaded = on_loaded
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clip-prefetch")
+        self.pending = OrderedDict()
+
+    def schedule(self, upcoming_paths):
+        wanted = list(upcoming_paths[:self.depth]) if self.depth > 0 else []
+        # Drop look-ahead work for clips that are no longer next in line
+        for path in list(self.pending):
+            if path not in wanted:
+                self.pending.pop(path).cancel()
+        for path in wanted:
+            if path not in self.pending:
+                self.pending[path] = self.executor.submit(self._load, path)
+
+    def _load(self, path):
+        clip = load_clip(path, self.cache, self.metrics, self.source)
+        if self.on_loaded is not None and clip.is_reviewable:
+            self.on_loaded(clip)
+        return clip
+
+    def get(self, path, upcoming_paths=()):
+        future = self.pending.pop(path, None)
+        # Queue the next clips before blocking so they decode while we wait
+        self.schedule(upcoming_paths)
+        if future is not None and future.done() and not future.cancelled():
+            try:
+                return future.result()
+            except MemoryBudgetExceeded:
+                pass
+        elif future is not None:
+            # Still decoding, or waiting for room in the decode budget (up to
+            # WAIT_SECONDS); the caller is the Tk thread, which never waits
+            future.cancel()
+        return load_clip(path, self.cache, self.metrics, self.source)
+
+    def is_ready(self, path):
+        future = self.pending.get(path)
+        return future is not None and future.done()
+
+    def cancel(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,272 @@
+import io
+import os
+import csv
+import sys
+import mmap
+import struct
+import zipfile
+import tarfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile as sf
+
+from audio_decode import read_mono, BLOCK_FRAMES
+from folder_catalog import AUDIO_EXTENSIONS, RESERVED_FOLDERS, FILTERED_SPECIES_FOLDER, NOISE_FOLDER, FALSE_POSITIVE_FOLDER
+
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+SEGMENT_INDEX_EXTENSIONS = ('.csv',)
+DECISION_FOLDERS = {"approve": FILTERED_SPECIES_FOLDER, "noise": NOISE_FOLDER, "false_positive": FALSE_POSITIVE_FOLDER}
+
+# signature, version, flags, method, time, date, crc, sizes, name and extra lengths
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+def clip_key(species, name):
+    return f"{species}/{name}"
+
+
+def split_member(member_name):
+    # ".../<species>/<clip>.wav" -> (species, clip); anything else is not a clip
+    parts = [p for p in member_name.replace('\\', '/').split('/') if p]
+    if len(parts) < 2 or not parts[-1].lower().endswith(AUDIO_EXTENSIONS):
+        return None
+    species, name = parts[-2], parts[-1]
+    if species.startswith('.') or species in RESERVED_FOLDERS or name.startswith('.'):
+        return None
+    return species, name
+
+
+# A packed source holds many clips in a few files. Clips are addressed by
+# "<species>/<name>" keys so the review queue works as it does with species
+# folders, and reads seek into the packed file instead of opening one file per
+# clip. Subclasses fill self.clips (key -> locator).
+class ClipSource:
+    def __init__(self, path):
+        self.path = path
+        self.clips = {}
+
+    def species(self):
+        return sorted({key.split('/', 1)[0] for key in self.clips})
+
+    def clip_names(self, species):
+        prefix = species + '/'
+        return sorted(key[len(prefix):] for key in self.clips if key.startswith(prefix))
+
+    def duration(self, key):
+        # None when only decoding the clip can tell
+        return None
+
+    def read(self, key):
+        raise NotImplementedError
+
+    def write_clip(self, key, dst):
+        y, sr = self.read(key)
+        sf.write(dst, y, sr)
+
+    def close(self):
+        pass
+
+
+class ArchiveClipSource(ClipSource):
+    # Uncompressed members (zip -0, plain .tar) are sliced straight out of a
+    # memory map of the archive without any locking; compressed members go
+    # through zipfile/tarfile under a lock.
+    def __init__(self, path):
+        super().__init__(path)
+        self.lock = threading.Lock()
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.is_zip = zipfile.is_zipfile(path)
+        self.compressed_tar = False
+        if self.is_zip:
+            self.archive = zipfile.ZipFile(path)
+            members = [(info.filename, info) for info in self.archive.infolist() if not info.is_dir()]
+        else:
+            try:
+                self.archive = tarfile.open(path, 'r:')
+            except tarfile.ReadError:
+                self.archive = tarfile.open(path)
+                self.compressed_tar = True
+            members = [(info.name, info) for info in self.archive.getmembers() if info.isfile()]
+        for member_name, info in members:
+            parsed = split_member(member_name)
+            if parsed is not None:
+                self.clips[clip_key(*parsed)] = info
+
+    def _span(self, info):
+        if self.is_zip:
+            if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+                return None
+            header = ZIP_LOCAL_HEADER.unpack_from(self.map, info.header_offset)
+            start = info.header_offset + ZIP_LOCAL_HEADER.size + header[-2] + header[-1]
+            return start, start + info.file_size
+        if self.compressed_tar:
+            return None
+        return info.offset_data, info.offset_data + info.size
+
+    def read_bytes(self, key):
+        info = self.clips[key]
+        span = self._span(info)
+        if span is not None:
+            return self.map[span[0]:span[1]]
+        with self.lock:
+            if self.is_zip:
+                return self.archive.read(info)
+            return self.archive.extractfile(info).read()
+
+    def read(self, key):
+        with sf.SoundFile(io.BytesIO(self.read_bytes(key))) as sound_file:
+            return read_mono(sound_file)
+
+    def write_clip(self, key, dst):
+        # The archived file is copied as is, so MP3s stay MP3s
+        with open(dst, 'wb') as f:
+            f.write(self.read_bytes(key))
+
+    def close(self):
+        self.archive.close()
+        self.map.close()
+        self.file.close()
+
+
+class SegmentIndexSource(ClipSource):
+    # A CSV with one row per detection in long recordings:
+    #   recording,offset,duration,species[,name]
+    # offset and duration are in seconds, recording is relative to the CSV.
+    def __init__(self, path):
+        super().__init__(path)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.handles = []
+        base_dir = os.path.dirname(os.path.abspath(path))
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                recording = os.path.join(base_dir, row["recording"])
+                offset, duration = float(row["offset"]), float(row["duration"])
+                name = row.get("name") or \
+                    f"{os.path.splitext(os.path.basename(recording))[0]}_{int(round(offset * 1000)):09d}.wav"
+                self.clips[clip_key(row["species"], name)] = (recording, offset, duration)
+
+    def duration(self, key):
+        return self.clips[key][2]
+
+    def _open(self, recording):
+        # One open handle per recording and thread; reads are a seek plus a short read
+        handles = getattr(self.local, 'handles', None)
+        if handles is None:
+            handles = self.local.handles = {}
+        sound_file = handles.get(recording)
+        if sound_file is None:
+            sound_file = handles[recording] = sf.SoundFile(recording)
+            with self.lock:
+                self.handles.append(sound_file)
+        return sound_file
+
+    def read(self, key):
+        recording, offset, duration = self.clips[key]
+        sound_file = self._open(recording)
+        sr = sound_file.samplerate
+        sound_file.seek(int(round(offset * sr)))
+        return read_mono(sound_file, int(round(duration * sr)))
+
+    def write_clip(self, key, dst):
+        # Copied block by block with every channel, so a long segment is never held whole
+        recording, offset, duration = self.clips[key]
+        sound_file = self._open(recording)
+        sr = sound_file.samplerate
+        sound_file.seek(int(round(offset * sr)))
+        with sf.SoundFile(dst, 'w', sr, sound_file.channels) as out:
+            for block in sound_file.blocks(BLOCK_FRAMES, frames=int(round(duration * sr)), dtype='float32'):
+                out.write(block)
+
+    def close(self):
+        with self.lock:
+            for sound_file in self.handles:
+                sound_file.close()
+            self.handles = []
+
+
+def open_clip_source(path):
+    if path.lower().endswith(ARCHIVE_EXTENSIONS):
+        return ArchiveClipSource(path)
+    if path.lower().endswith(SEGMENT_INDEX_EXTENSIONS):
+        return SegmentIndexSource(path)
+    raise ValueError(f"Unsupported clip source: {path}")
+
+
+def export_path(out_folder, key, decision, qualify=False):
+    # noise/ and false_positive/ hold every species; qualify prefixes the
+    # species for a name two species share there
+    species, name = key.split('/', 1)
+    folder = DECISION_FOLDERS[decision]
+    if decision == "approve":
+        return os.path.join(out_folder, folder, species, name)
+    if qualify:
+        name = f"{species}__{name}"
+    return os.path.join(out_folder, folder, name)
+
+
+def export_labels(source, labels, out_folder, max_workers=8):
+    # Materializes filtered_species_files/<species>, noise/ and false_positive/
+    # from a label manifest in one pass. Clips already exported are left alone,
+    # so an interrupted export can simply be run again. Returns the number of
+    # clips written and the number exported under a species-qualified name.
+    decided = [(key, decision) for key, decision in labels.decisions().items()
+               if key in source.clips and decision in DECISION_FOLDERS]
+    dsts = {}
+    for key, decision in decided:
+        dsts.setdefault(export_path(out_folder, key, decision), []).append(key)
+    todo = []
+    renamed = 0
+    for key, decision in decided:
+        dst = export_path(out_folder, key, decision)
+        if len(dsts[dst]) > 1:
+            dst = export_path(out_folder, key, decision, qualify=True)
+            renamed += 1
+        if not os.path.exists(dst):
+            todo.append((key, dst))
+    for folder in {os.path.dirname(dst) for _, dst in todo}:
+        os.makedirs(folder, exist_ok=True)
+
+    def write(item):
+        key, dst = item
+        root, ext = os.path.splitext(dst)
+        # Keeps the extension, which sf.write uses to pick the format
+        tmp_path = root + '.part' + ext
+        source.write_clip(key, tmp_path)
+        os.replace(tmp_path, dst)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="label-export") as executor:
+        list(executor.map(write, todo))
+    return len(todo), renamed
+
+
+def main(argv=None):
+    from label_manifest import LabelManifest, labels_path
+
+    parser = argparse.ArgumentParser(description="Export the decisions recorded for a packed clip source "
+                                                 "into the filtered_species_files/noise/false_positive layout.")
+    parser.add_argument("source", help="Zip/tar of clips or a segment index CSV")
+    parser.add_argument("out_folder")
+    parser.add_argument("--labels", help="Label manifest (default: next to the source)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    source = open_clip_source(args.source)
+    labels = LabelManifest(args.labels or labels_path(args.source))
+    try:
+        written, renamed = export_labels(source, labels, args.out_folder, args.workers)
+    finally:
+        labels.close()
+        source.close()
+    print(f"Exported {written} clips to {args.out_folder}")
+    if renamed:
+        print(f"{renamed} clips sharing a name with another species' clip were exported as <species>__<name>")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
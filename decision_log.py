@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import threading
+
+
+UNDONE = "undone"
+
+
+def read_records(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-write can leave a torn last line
+                continue
+
+
+# Append-only JSONL history of review decisions, shared by MoveJournal (files
+# moved in a species folder) and LabelManifest (clips labeled in a packed
+# source). Every record is fsynced before the call returns and the file is
+# replayed on open. Entries are numbered per file; undo() walks back from the
+# newest entry not yet undone. Subclasses name their decision op and say how
+# other ops change an entry's status.
+class DecisionLog:
+    decide_op = None
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.order = []
+        self.lock = threading.RLock()
+        self.log_lock = threading.Lock()
+        if os.path.exists(self.path):
+            for record in read_records(self.path):
+                op = record.get("op")
+                if op == self.decide_op:
+                    entry = self._entry_from_record(record)
+                    self.entries[entry.id] = entry
+                    self.order.append(entry.id)
+                elif record.get("id") in self.entries:
+                    self.entries[record["id"]].status = self._status_after(op)
+        self._count_statuses()
+        self.log = open(self.path, 'a', encoding='utf-8')
+
+    def _count_statuses(self):
+        # Kept up to date by _add and _set_status, so callers polling for
+        # counts never walk the whole history
+        self.status_counts = {}
+        for entry in self.entries.values():
+            self.status_counts[entry.status] = self.status_counts.get(entry.status, 0) + 1
+
+    def _entry_from_record(self, record):
+        raise NotImplementedError
+
+    def _status_after(self, op):
+        raise NotImplementedError
+
+    def _append(self, record):
+        with self.log_lock:
+            self.log.write(json.dumps(record) + "\n")
+            self.log.flush()
+            os.fsync(self.log.fileno())
+
+    def _next_id(self):
+        return (self.order[-1] + 1) if self.order else 1
+
+    def _add(self, entry, record):
+        # Called with self.lock held, so ids stay in file order
+        self._append(record)
+        self.entries[entry.id] = entry
+        self.order.append(entry.id)
+        self.status_counts[entry.status] = self.status_counts.get(entry.status, 0) + 1
+
+    def _set_status(self, entry, status):
+        # Called with self.lock held
+        self.status_counts[entry.status] -= 1
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        entry.status = status
+
+    def _revert(self, entry):
+        # Undoes whatever the entry did beyond being written down
+        pass
+
+    def undo(self, count=1):
+        reverted = []
+        with self.lock:
+            for entry_id in reversed(self.order):
+                if len(reverted) >= count:
+                    break
+                entry = self.entries[entry_id]
+                if entry.status == UNDONE:
+                    continue
+                self._revert(entry)
+                self._set_status(entry, UNDONE)
+                self._append({"op": "undo", "id": entry.id, "time": time.time()})
+                reverted.append(entry)
+        return reverted
+
+    def close(self):
+        with self.log_lock:
+            self.log.close()
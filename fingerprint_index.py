@@ -0,0 +1,211 @@
+import numpy as np
+
+from spectrogram_renderer import crop_to_max_freq, MAX_DISPLAY_FREQ
+
+
+SIGNATURE_BITS = 64
+GRID_BANDS = 16
+GRID_BLOCKS = 8
+FLOOR_DB = 3.0
+DEFAULT_MAX_DISTANCE = 8
+MIN_RANGES = 4
+# Clips added since the last sort that lookups scan directly
+TAIL_SIZE = 256
+
+
+# Fixed random hyperplanes: the same seed must give the same signatures on
+# every machine, or fingerprints stored in different catalogs won't compare
+_PLANES = np.random.default_rng(0x5EED).standard_normal((SIGNATURE_BITS, GRID_BANDS * GRID_BLOCKS)).astype(np.float32)
+
+
+def _edges(length, parts):
+    return np.linspace(0, length, parts + 1).round().astype(np.intp)[:-1]
+
+
+def fingerprint(S_db, sr, max_freq=MAX_DISPLAY_FREQ):
+    # 64-bit SimHash of a dB spectrogram. The displayed band is pooled into a
+    # GRID_BANDS x GRID_BLOCKS map (mean over frequency, loudest frame in each
+    # block), and only what stands more than FLOOR_DB above the clip's median
+    # is kept, so neither gain nor a different draw of the same background
+    # noise moves the signature. Each bit is the side of a random hyperplane
+    # the map falls on: similar maps share most bits, unrelated ones about
+    # half. Clips with nothing above the floor all hash to 0.
+    cropped, _ = crop_to_max_freq(np.asarray(S_db, dtype=np.float32), sr, max_freq)
+    if cropped.shape[0] < GRID_BANDS or cropped.shape[1] < GRID_BLOCKS:
+        return 0
+    rows = _edges(cropped.shape[0], GRID_BANDS)
+    bands = np.add.reduceat(cropped, rows, axis=0) / np.diff(np.append(rows, cropped.shape[0]))[:, None]
+    grid = np.maximum.reduceat(bands, _edges(cropped.shape[1], GRID_BLOCKS), axis=1)
+    features = np.maximum(grid - np.median(grid) - FLOOR_DB, 0).ravel()
+    bits = (_PLANES @ features > 0).astype(np.uint8)
+    return int(np.packbits(bits, bitorder='little').view('<u8')[0])
+
+
+def fingerprint_clips(paths, cache=None, chunk_size=16):
+    # path -> signature for every clip that could be decoded; spectrograms come
+    # from the cache or one batched STFT per chunk
+    from clip_loader import load_clips
+
+    signatures = {}
+    for i in range(0, len(paths), chunk_size):
+        for clip in load_clips(paths[i:i + chunk_size], cache):
+            if clip is not None and clip.S_db is not None:
+                signatures[clip.path] = fingerprint(clip.S_db, clip.sr)
+    return signatures
+
+
+# Near-duplicate search over 64-bit signatures (multi-index hashing). Each
+# signature is cut into at least max_distance // 2 + 1 bit ranges; two
+# signatures at most max_distance bits apart then differ by at most one bit in
+# some range, so a lookup only compares entries whose value in some range
+# equals the query's or is one bit off. Every range keeps its entries sorted
+# by value with an offset table into that order. Entries added since the last
+# sort sit in a short tail that is scanned directly, and a longer tail is
+# sorted in by the next lookup, so adding clips one at a time never rebuilds
+# anything. Clips with identical signatures (silence, the same recording
+# twice) share one entry.
+class FingerprintIndex:
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, capacity=1024):
+        self.max_distance = max_distance
+        # At least MIN_RANGES so each range's offset table stays small
+        bounds = np.linspace(0, SIGNATURE_BITS, max(max_distance // 2 + 1, MIN_RANGES) + 1).round().astype(np.uint64)
+        self.shifts = bounds[:-1]
+        self.masks = (np.uint64(1) << (bounds[1:] - bounds[:-1])) - np.uint64(1)
+        # Per range: the value itself and every value one bit away
+        self.probes = [np.array([0] + [1 << b for b in range(int(hi - lo))], dtype=np.uint64)
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self.signature_of = {}
+        # One entry per distinct signature; its keys as an insertion-ordered dict
+        self.entry_of = {}
+        self.entry_keys = []
+        self.signatures = np.zeros(capacity, dtype=np.uint64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Per range: entry ids ordered by that range's value, and where each
+        # value's run starts in that order
+        self.order = np.zeros((len(self.shifts), 0), dtype=np.intp)
+        self.offsets = [np.zeros(int(mask) + 2, dtype=np.intp) for mask in self.masks]
+        self.sorted_count = 0
+
+    def __len__(self):
+        return len(self.signature_of)
+
+    def __contains__(self, key):
+        return key in self.signature_of
+
+    def keys(self):
+        return list(self.signature_of)
+
+    def _range_values(self, signatures):
+        return (signatures[..., None] >> self.shifts) & self.masks
+
+    def add(self, key, signature):
+        if key in self.signature_of:
+            if self.signature_of[key] == signature:
+                return
+            self.remove(key)
+        entry_id = self.entry_of.get(signature)
+        if entry_id is None:
+            entry_id = len(self.entry_keys)
+            if entry_id == len(self.signatures):
+                self.signatures = np.concatenate([self.signatures, np.zeros_like(self.signatures)])
+                self.alive = np.concatenate([self.alive, np.zeros_like(self.alive)])
+            self.entry_keys.append({})
+            self.entry_of[signature] = entry_id
+            self.signatures[entry_id] = signature
+            self.alive[entry_id] = True
+        self.entry_keys[entry_id][key] = None
+        self.signature_of[key] = signature
+
+    def remove(self, key):
+        signature = self.signature_of.pop(key, None)
+        if signature is None:
+            return
+        entry_id = self.entry_of[signature]
+        del self.entry_keys[entry_id][key]
+        if not self.entry_keys[entry_id]:
+            # The slot stays behind as a tombstone; lookups skip it
+            self.alive[entry_id] = False
+            del self.entry_of[signature]
+
+    def _merge(self):
+        count = len(self.entry_keys)
+        values = self._range_values(self.signatures[:count]).T
+        self.order = np.argsort(values, axis=1, kind='stable')
+        for r, mask in enumerate(self.masks):
+            self.offsets[r] = np.searchsorted(values[r, self.order[r]], np.arange(int(mask) + 2, dtype=np.uint64))
+        self.sorted_count = count
+
+    def _lookup(self, signatures, max_distance):
+        # Every (query, entry) pair within max_distance for an array of query
+        # signatures, ordered by query and then by distance
+        if len(self.entry_keys) - self.sorted_count > TAIL_SIZE:
+            self._merge()
+        count = len(signatures)
+        tail = np.arange(self.sorted_count, len(self.entry_keys))
+        queries = [np.repeat(np.arange(count), len(tail))]
+        entries = [np.tile(tail, count)]
+        values = self._range_values(signatures)
+        for r, probes in enumerate(self.probes):
+            probes = (values[:, r, None] ^ probes).ravel().astype(np.intp)
+            starts = self.offsets[r][probes]
+            lengths = self.offsets[r][probes + 1] - starts
+            # Expand each matching run of the sorted range into entry ids
+            positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            entries.append(self.order[r, positions])
+            queries.append(np.repeat(np.arange(count).repeat(len(self.probes[r])), lengths))
+        queries = np.concatenate(queries)
+        entries = np.concatenate(entries)
+        distances = np.bitwise_count(self.signatures[entries] ^ signatures[queries])
+        keep = (distances <= max_distance) & self.alive[entries]
+        queries, entries, distances = queries[keep], entries[keep], distances[keep]
+        order = np.lexsort((entries, distances, queries))
+        queries, entries = queries[order], entries[order]
+        # An entry matching on several ranges is found once per range
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (queries[1:] != queries[:-1]) | (entries[1:] != entries[:-1])
+        return queries[first], entries[first]
+
+    def neighbours(self, signature, max_distance=None):
+        # Keys within max_distance bits of `signature`, nearest first
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        _, entries = self._lookup(np.array([signature], dtype=np.uint64), max_distance)
+        return [key for entry_id in entries for key in self.entry_keys[entry_id]]
+
+    def group(self, keys, max_distance=None, batch_size=256):
+        # Splits `keys` (in review order) into groups of near-duplicates. The
+        # first key not yet grouped leads a new group and takes every other
+        # ungrouped key within max_distance of itself, so a group never drifts
+        # away from its representative the way chained matches would.
+        # Keys without a signature stay on their own.
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        queued = {}
+        for key in keys:
+            signature = self.signature_of.get(key)
+            if signature is not None:
+                queued.setdefault(self.entry_of[signature], []).append(key)
+        leaders = list(queued)
+        position = {entry_id: i for i, entry_id in enumerate(leaders)}
+        available = np.zeros(len(self.entry_keys), dtype=bool)
+        available[leaders] = True
+        neighbours = {}
+        groups = []
+        for key in keys:
+            signature = self.signature_of.get(key)
+            if signature is None:
+                groups.append([key])
+                continue
+            entry_id = self.entry_of[signature]
+            if not available[entry_id]:
+                continue
+            if entry_id not in neighbours:
+                # Look up the next batch of possible leaders in one go
+                start = position[entry_id]
+                batch = [e for e in leaders[start:start + batch_size] if available[e]]
+                queries, entries = self._lookup(self.signatures[batch], max_distance)
+                bounds = np.searchsorted(queries, np.arange(len(batch) + 1))
+                neighbours = {e: entries[lo:hi] for e, lo, hi in zip(batch, bounds[:-1], bounds[1:])}
+            members = neighbours.pop(entry_id)
+            members = members[available[members]]
+            available[members] = False
+            groups.append([k for e in members for k in queued[e]])
+        return groups
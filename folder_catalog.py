@@ -0,0 +1,191 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+FILTERED_SPECIES_FOLDER = "filtered_species_files"
+NOISE_FOLDER = "noise"
+FALSE_POSITIVE_FOLDER = "false_positive"
+RESERVED_FOLDERS = (FILTERED_SPECIES_FOLDER, NOISE_FOLDER, FALSE_POSITIVE_FOLDER)
+
+PENDING = "pending"
+APPROVED = "approved"
+NOISE = "noise"
+FALSE_POSITIVE = "false_positive"
+STATUSES = (PENDING, APPROVED, NOISE, FALSE_POSITIVE)
+
+# Bumped whenever triage.py changes how clips are scored; older scores are dropped
+SCORE_VERSION = 2
+
+CATALOG_DIR = os.path.join(tempfile.gettempdir(), 'bird_sound_examiner_catalogs')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    dir TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clips (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    species TEXT NOT NULL,
+    status TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    duration REAL,
+    score REAL,
+    noise_confidence REAL,
+    fingerprint INTEGER,
+    PRIMARY KEY (dir, name)
+);
+CREATE INDEX IF NOT EXISTS clips_species_status ON clips (species, status);
+"""
+
+
+def catalog_path(main_folder):
+    folder_hash = hashlib.sha1(os.path.abspath(main_folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CATALOG_DIR, f"catalog_{folder_hash}.sqlite")
+
+
+# Index of every clip under a main_folder, kept in a local SQLite file (never on
+# the share itself). A directory is only rescanned when its mtime changes, which
+# is what happens whenever a clip is added to or moved out of it.
+class FolderCatalog:
+    def __init__(self, main_folder, path=None, metrics=None):
+        self.main_folder = main_folder
+        self.metrics = metrics
+        self.path = path or catalog_path(main_folder)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(clips)")}
+        for column, column_type in (("score", "REAL"), ("noise_confidence", "REAL"), ("fingerprint", "INTEGER")):
+            # Catalogs written before triage scores or fingerprints existed
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE clips ADD COLUMN {column} {column_type}")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < SCORE_VERSION:
+            self.db.execute("UPDATE clips SET score = NULL, noise_confidence = NULL")
+            self.db.execute(f"PRAGMA user_version = {SCORE_VERSION}")
+            self.db.commit()
+        self.species = []
+
+    def close(self):
+        self.db.close()
+
+    def _watched_dirs(self):
+        dirs = [(species, species, PENDING) for species in self.species]
+        for species in self.species:
+            dirs.append((os.path.join(FILTERED_SPECIES_FOLDER, species), species, APPROVED))
+        dirs.append((NOISE_FOLDER, None, NOISE))
+        dirs.append((FALSE_POSITIVE_FOLDER, None, FALSE_POSITIVE))
+        return dirs
+
+    def refresh(self, species_hints=None, only_species=None):
+        # species_hints: a callable returning {clip name: species} for clips
+        # found in noise/false_positive; only called when such a folder changed
+        self.species = sorted(f for f in os.listdir(self.main_folder)
+                              if os.path.isdir(os.path.join(self.main_folder, f))
+                              and not f.startswith('.') and f not in RESERVED_FOLDERS)
+        watched = self._watched_dirs()
+        if only_species is not None:
+            watched = [d for d in watched if d[1] in (only_species, None)]
+
+        # Clips that vanish from one folder usually reappear in another (a decision
+        # moved them); remember their species so noise/false_positive rows keep it.
+        moved = {}
+        changed = []
+        for rel_dir, species, status in watched:
+            abs_dir = os.path.join(self.main_folder, rel_dir)
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                mtime_ns = -1
+            row = self.db.execute("SELECT mtime_ns FROM dirs WHERE dir = ?", (rel_dir,)).fetchone()
+            if row is not None and row[0] == mtime_ns:
+                continue
+            changed.append((rel_dir, abs_dir, species, status, mtime_ns))
+
+        scanned = {}
+        hints = None
+        for rel_dir, abs_dir, species, status, mtime_ns in changed:
+            entries = {}
+            if mtime_ns != -1:
+                start = time.perf_counter()
+                with os.scandir(abs_dir) as it:
+                    for entry in it:
+                        if entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                            st = entry.stat()
+                            entries[entry.name] = (st.st_size, int(st.st_mtime))
+                if self.metrics is not None:
+                    self.metrics.since("scan", start)
+            existing = {name: (size, mtime, row_species, duration) for name, size, mtime, row_species, duration in
+                        self.db.execute("SELECT name, size, mtime, species, duration FROM clips WHERE dir = ?", (rel_dir,))}
+            gone = [name for name in existing if name not in entries]
+            for name in gone:
+                size, mtime, row_species, duration = existing[name]
+                moved[(name, size, mtime)] = (row_species, duration)
+            self.db.executemany("DELETE FROM clips WHERE dir = ? AND name = ?", [(rel_dir, name) for name in gone])
+            scanned[rel_dir] = (entries, existing)
+
+        for rel_dir, abs_dir, species, status, mtime_ns in changed:
+            entries, existing = scanned[rel_dir]
+            rows = []
+            for name, (size, mtime) in entries.items():
+                old = existing.get(name)
+                if old is not None and old[0] == size and old[1] == mtime:
+                    continue
+                row_species, duration = moved.get((name, size, mtime), (species, None))
+                if row_species is None:
+                    if hints is None:
+                        hints = species_hints() if species_hints is not None else {}
+                    row_species = hints.get(name, "")
+                rows.append((rel_dir, name, row_species, status, size, mtime, duration))
+            self.db.executemany("INSERT OR REPLACE INTO clips (dir, name, species, status, size, mtime, duration) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (rel_dir, mtime_ns))
+        self.db.commit()
+        return len(changed)
+
+    def counts(self):
+        counts = {species: dict.fromkeys(STATUSES, 0) for species in self.species}
+        for species, status, count in self.db.execute("SELECT species, status, COUNT(*) FROM clips GROUP BY species, status"):
+            if species in counts:
+                counts[species][status] = count
+        return counts
+
+    def count(self, species, status):
+        return self.db.execute("SELECT COUNT(*) FROM clips WHERE species = ? AND status = ?", (species, status)).fetchone()[0]
+
+    def pending_clips(self, species):
+        return self.db.execute("SELECT name, duration, score, noise_confidence FROM clips WHERE dir = ? AND status = ? ORDER BY name",
+                               (species, PENDING)).fetchall()
+
+    def set_durations(self, species, durations):
+        self.db.executemany("UPDATE clips SET duration = ? WHERE dir = ? AND name = ?",
+                            [(duration, species, name) for name, duration in durations.items()])
+        self.db.commit()
+
+    def unknown_durations(self, species):
+        # name -> (size, mtime) for pending clips whose header hasn't been read yet
+        return {name: (size, mtime) for name, size, mtime in
+                self.db.execute("SELECT name, size, mtime FROM clips WHERE dir = ? AND status = ? AND duration IS NULL",
+                                (species, PENDING))}
+
+    def fingerprints(self, species):
+        # SQLite integers are signed; signatures are unsigned 64-bit
+        return {name: fingerprint & 0xFFFFFFFFFFFFFFFF for name, fingerprint in
+                self.db.execute("SELECT name, fingerprint FROM clips WHERE dir = ? AND status = ? AND fingerprint IS NOT NULL",
+                                (species, PENDING))}
+
+    def set_fingerprints(self, species, fingerprints):
+        self.db.executemany("UPDATE clips SET fingerprint = ? WHERE dir = ? AND name = ?",
+                            [(fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint, species, name)
+                             for name, fingerprint in fingerprints.items()])
+        self.db.commit()
+
+    def set_scores(self, species, scores):
+        self.db.executemany("UPDATE clips SET score = ?, noise_confidence = ? WHERE dir = ? AND name = ?",
+                            [(score, noise_confidence, species, name) for name, (score, noise_confidence) in scores.items()])
+        self.db.commit()
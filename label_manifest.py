@@ -0,0 +1,59 @@
+import os
+import time
+import hashlib
+import tempfile
+
+from decision_log import DecisionLog, UNDONE
+
+
+LABELS_SUFFIX = ".labels.jsonl"
+
+LABELED = "labeled"
+
+
+def labels_path(source_path):
+    return source_path + LABELS_SUFFIX
+
+
+def fallback_labels_path(source_path):
+    source_hash = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(tempfile.gettempdir(), f'bird_sound_examiner_labels_{source_hash}.jsonl')
+
+
+class LabelEntry:
+    def __init__(self, entry_id, src, decision, species):
+        self.id = entry_id
+        self.src = src
+        self.decision = decision
+        self.species = species
+        self.status = LABELED
+
+
+# Decisions for clips in a packed source (see clip_sources). Nothing is moved,
+# so an entry is only written down and undone; export_labels turns the
+# manifest into folders later.
+class LabelManifest(DecisionLog):
+    decide_op = "label"
+
+    def _entry_from_record(self, record):
+        return LabelEntry(record["id"], record["clip"], record["decision"], record.get("species", ""))
+
+    def _status_after(self, op):
+        return UNDONE if op == "undo" else LABELED
+
+    def record(self, key, decision, species):
+        with self.lock:
+            entry = LabelEntry(self._next_id(), key, decision, species)
+            self._add(entry, {"op": "label", "id": entry.id, "clip": key, "decision": decision,
+                              "species": species, "time": time.time()})
+        return entry
+
+    def decisions(self):
+        # Latest decision per clip; a clip relabeled after an undo keeps the new one
+        with self.lock:
+            return {e.src: e.decision for e in (self.entries[i] for i in self.order) if e.status == LABELED}
+
+    def count(self, decision, species=None):
+        with self.lock:
+            return sum(1 for e in self.entries.values()
+                       if e.status == LABELED and e.decision == decision and (species is None or e.species == species))
@@ -0,0 +1,135 @@
+import os
+import csv
+import sys
+import json
+import time
+import bisect
+import platform
+import tempfile
+import threading
+from collections import deque
+
+
+METRICS_DIR_ENV = 'BIRD_SOUND_EXAMINER_METRICS_DIR'
+METRICS_FILE_PREFIX = 'bird_sound_examiner_latency'
+PROMETHEUS_METRIC = 'bird_sound_examiner_stage_latency_seconds'
+
+# Upper bounds in seconds, Prometheus style (the last bucket is +Inf)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 512
+
+
+def metrics_dir():
+    return os.environ.get(METRICS_DIR_ENV) or tempfile.gettempdir()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100.0))]
+
+
+class StageHistogram:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # (perf_counter, seconds) of the latest samples, for live percentiles and rates
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds, now):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append((now, seconds))
+
+
+# Hot-path timings (decode, STFT, render, playback start, moves, scans, and the
+# time from a decision to the next spectrogram on screen). Recording is a lock,
+# a bisect and a deque append, so it is safe to call from worker threads and
+# the audio callback. Everything is exported once, when the session ends.
+class LatencyMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        now = time.perf_counter()
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = StageHistogram()
+            histogram.observe(seconds, now)
+
+    def since(self, stage, start):
+        self.observe(stage, time.perf_counter() - start)
+
+    def recent_percentiles(self, stage, percentiles=(50, 95)):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            values = sorted(seconds for _, seconds in histogram.recent) if histogram else []
+        return {p: percentile(values, p) for p in percentiles}
+
+    def rate_per_minute(self, stage, window=60.0):
+        now = time.perf_counter()
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None or not histogram.recent:
+                return 0.0
+            times = [t for t, _ in histogram.recent if now - t <= window]
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        # Intervals between events in the window, so a short session isn't diluted
+        return (len(times) - 1) * 60.0 / (times[-1] - times[0])
+
+    def summary(self):
+        summary = {}
+        with self.lock:
+            for stage, histogram in sorted(self.stages.items()):
+                values = sorted(seconds for _, seconds in histogram.recent)
+                summary[stage] = {"count": histogram.count, "sum_s": histogram.total, "max_s": histogram.max,
+                                  "mean_s": histogram.total / histogram.count,
+                                  "p50_s": percentile(values, 50), "p95_s": percentile(values, 95),
+                                  "p99_s": percentile(values, 99),
+                                  "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], histogram.bucket_counts))}
+        return summary
+
+    def export(self, directory=None, info=None):
+        # Returns the paths written; nothing is written for a session with no samples
+        summary = self.summary()
+        if not summary:
+            return []
+        directory = directory or metrics_dir()
+        base = os.path.join(directory, METRICS_FILE_PREFIX)
+        entry = {"time": time.time(), "started": self.started, "host": platform.node(),
+                 "python": sys.version.split()[0], "info": info or {}, "stages": summary}
+        # One JSON line per session, so workstations and storage backends can be compared over time
+        with open(base + '.jsonl', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        with open(base + '.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+            for stage, s in summary.items():
+                writer.writerow([stage, s["count"]] + [f"{s[k] * 1000:.3f}" for k in ("mean_s", "p50_s", "p95_s", "p99_s", "max_s")])
+        self.write_prometheus(base + '.prom', summary)
+        return [base + '.jsonl', base + '.csv', base + '.prom']
+
+    def write_prometheus(self, path, summary):
+        # Textfile collector format; written to a temp file and renamed so the
+        # node exporter never reads a half-written file
+        lines = [f"# HELP {PROMETHEUS_METRIC} Latency of each review stage in seconds.",
+                 f"# TYPE {PROMETHEUS_METRIC} histogram"]
+        for stage, s in summary.items():
+            cumulative = 0
+            for bound, count in s["buckets"].items():
+                cumulative += count
+                lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_METRIC}_sum{{stage="{stage}"}} {s["sum_s"]}')
+            lines.append(f'{PROMETHEUS_METRIC}_count{{stage="{stage}"}} {s["count"]}')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
@@ -0,0 +1,300 @@
+import os
+import re
+import glob
+import json
+import time
+import queue
+import shutil
+import socket
+import getpass
+import threading
+
+from decision_log import DecisionLog, read_records, UNDONE
+
+
+JOURNAL_PREFIX = "decision_journal"
+# Settled entries a journal may hold when opened before they are rotated out
+DEFAULT_ROTATE_AFTER = 1000
+
+PENDING = "pending"
+APPLIED = "applied"
+FAILED = "failed"
+
+
+class JournalEntry:
+    def __init__(self, entry_id, src, dst, decision, species):
+        self.id = entry_id
+        self.src = src
+        self.dst = dst
+        self.decision = decision
+        self.species = species
+        self.status = PENDING
+        self.attempts = 0
+
+
+def journal_owner():
+    # Stable across restarts, so a reviewer replays its own unapplied moves
+    # after a crash, and distinct per machine and user on a shared folder
+    try:
+        user = getpass.getuser()
+    except (OSError, KeyError, ImportError):
+        user = "user"
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', f"{socket.gethostname()}-{user}")
+
+
+def _lock_exclusive(f):
+    # Held until the process exits or closes the file, so a crashed session
+    # never leaves its journal locked
+    if os.name == 'nt':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def claim_journal_path(journal_path, attempts=100):
+    # Two sessions of one user on one machine get "<name>-2.jsonl" and so on
+    # rather than appending to the same file. Returns the path and the open
+    # lock file, which the journal keeps until it is closed.
+    base, ext = os.path.splitext(journal_path)
+    for n in range(1, attempts + 1):
+        path = journal_path if n == 1 else f"{base}-{n}{ext}"
+        lock_file = open(path + ".lock", 'a+')
+        try:
+            _lock_exclusive(lock_file)
+            return path, lock_file
+        except OSError:
+            lock_file.close()
+    raise OSError(f"No free decision journal next to {journal_path}")
+
+
+# Every decision is appended to an on-disk log before anything touches the
+# filesystem; a background worker applies the moves. Paths are stored relative
+# to main_folder so a share mounted under a different drive letter still replays.
+# Each reviewer writes, replays and undoes only its own journal
+# (decision_journal.<host>-<user>.jsonl), so reviewers sharing a folder never
+# hand out the same entry ids or apply each other's moves.
+class MoveJournal(DecisionLog):
+    decide_op = "decide"
+
+    def __init__(self, main_folder, journal_path=None, batch_size=20, max_retries=5, retry_delay=1.0, metrics=None,
+                 rotate_after=DEFAULT_ROTATE_AFTER):
+        self.main_folder = main_folder
+        path, self.lock_file = claim_journal_path(
+            journal_path or os.path.join(main_folder, f"{JOURNAL_PREFIX}.{journal_owner()}.jsonl"))
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.metrics = metrics
+        self.queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.last_error = None
+        # Other reviewers' journals: path -> ((size, mtime_ns), {clip name: species})
+        self.journal_hints = {}
+
+        # self.lock guards entry status; moves and fsyncs happen outside it so
+        # the Tk thread's record() and stats() never wait on a slow share
+        try:
+            self._finish_rotation(path)
+            super().__init__(path)
+            if self.status_counts.get(APPLIED, 0) + self.status_counts.get(UNDONE, 0) >= rotate_after:
+                self._rotate()
+        except OSError:
+            self.lock_file.close()
+            raise
+        # Entries still to move, so polling them never walks the history
+        self.pending = {i: self.entries[i] for i in self.order if self.entries[i].status == PENDING}
+        # The entry the worker is moving right now; undo() waits for that one move
+        self.moving = None
+        self.moved = threading.Condition(self.lock)
+        self.worker = threading.Thread(target=self._run, name="move-journal", daemon=True)
+        self.worker.start()
+
+    def _entry_from_record(self, record):
+        return JournalEntry(record["id"], record["src"], record["dst"], record["decision"], record.get("species", ""))
+
+    def _status_after(self, op):
+        return {"applied": APPLIED, "undo": UNDONE, "failed": FAILED}.get(op, PENDING)
+
+    def _set_status(self, entry, status):
+        super()._set_status(entry, status)
+        if status == PENDING:
+            self.pending[entry.id] = entry
+        else:
+            self.pending.pop(entry.id, None)
+
+    @staticmethod
+    def _finish_rotation(path):
+        # _rotate writes the rewritten journal to <path>.tmp before archiving
+        # the old one; a crash between the two leaves one of them to clean up
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+
+    def _rotate(self):
+        # Applied and undone entries are done with; they move to
+        # <journal>.<timestamp>.jsonl, which species_by_name still reads, and
+        # only pending and failed ones stay in the live journal
+        keep = {i for i in self.order if self.entries[i].status in (PENDING, FAILED)}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in read_records(self.path):
+                if record.get("id") in keep and record.get("op") in ("decide", "failed"):
+                    f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        base, ext = os.path.splitext(self.path)
+        with self.log_lock:
+            self.log.close()
+            os.replace(self.path, f"{base}.{time.strftime('%Y%m%d-%H%M%S')}{ext}")
+            os.replace(tmp_path, self.path)
+            self.log = open(self.path, 'a', encoding='utf-8')
+        for entry_id in self.order:
+            if entry_id not in keep:
+                del self.entries[entry_id]
+        self.order = [i for i in self.order if i in keep]
+        self._count_statuses()
+
+    def _abs(self, rel_path):
+        return os.path.normpath(os.path.join(self.main_folder, rel_path))
+
+    def replay(self):
+        # Re-queue anything decided but never applied (e.g. after a crash)
+        with self.lock:
+            unapplied = [self.entries[i] for i in self.order if self.entries[i].status in (PENDING, FAILED)]
+            for entry in unapplied:
+                self._set_status(entry, PENDING)
+                entry.attempts = 0
+                self.queue.put(entry.id)
+        return len(unapplied)
+
+    def record(self, src, dst, decision, species):
+        with self.lock:
+            entry = JournalEntry(self._next_id(), os.path.relpath(src, self.main_folder),
+                                 os.path.relpath(dst, self.main_folder), decision, species)
+            self._add(entry, {"op": "decide", "id": entry.id, "src": entry.src, "dst": entry.dst,
+                              "decision": decision, "species": species, "time": time.time()})
+            self.pending[entry.id] = entry
+        self.queue.put(entry.id)
+        return entry
+
+    def _revert(self, entry):
+        while self.moving == entry.id:
+            self.moved.wait()
+        if entry.status == APPLIED:
+            src, dst = self._abs(entry.src), self._abs(entry.dst)
+            os.makedirs(os.path.dirname(src), exist_ok=True)
+            shutil.move(dst, src)
+        # Pending entries are simply marked; the worker skips them
+
+    def _apply(self, entry):
+        src, dst = self._abs(entry.src), self._abs(entry.dst)
+        if not os.path.exists(src) and os.path.exists(dst):
+            # Already moved before a crash, just the "applied" record was lost
+            return
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(src, dst)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                batch = [self.queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            retry = []
+            for entry_id in batch:
+                with self.lock:
+                    entry = self.entries[entry_id]
+                    if entry.status != PENDING:
+                        continue
+                    self.moving = entry_id
+                record = None
+                try:
+                    start = time.perf_counter()
+                    self._apply(entry)
+                    if self.metrics is not None:
+                        self.metrics.since("move", start)
+                    record = {"op": "applied", "id": entry.id}
+                    self._append(record)
+                except OSError as e:
+                    entry.attempts += 1
+                    self.last_error = f"{entry.src}: {e}"
+                    if entry.attempts >= self.max_retries:
+                        record = {"op": "failed", "id": entry.id, "error": str(e)}
+                        self._append(record)
+                    else:
+                        retry.append(entry_id)
+                with self.moved:
+                    # undo() waits while this entry is moving, so it is still pending
+                    if record is not None and entry.status == PENDING:
+                        self._set_status(entry, APPLIED if record["op"] == "applied" else FAILED)
+                    self.moving = None
+                    self.moved.notify_all()
+            if retry:
+                self.stop_event.wait(self.retry_delay)
+                for entry_id in retry:
+                    self.queue.put(entry_id)
+
+    def stats(self):
+        with self.lock:
+            return {status: self.status_counts.get(status, 0) for status in (PENDING, APPLIED, UNDONE, FAILED)}
+
+    def pending_count(self, decision=None, species=None):
+        with self.lock:
+            return sum(1 for e in self.pending.values()
+                       if (decision is None or e.decision == decision)
+                       and (species is None or e.species == species))
+
+    def species_by_name(self):
+        # noise/ and false_positive/ are shared folders; the journals remember
+        # which species each clip came from. Other reviewers' journals in the
+        # folder are read too, without taking them over.
+        hints = {}
+        pattern = os.path.join(glob.escape(os.path.dirname(self.path)), f"{JOURNAL_PREFIX}.*.jsonl")
+        own = os.path.normcase(os.path.abspath(self.path))
+        for path in glob.glob(pattern):
+            if os.path.normcase(os.path.abspath(path)) == own:
+                continue
+            try:
+                hints.update(self._journal_hints(path))
+            except (OSError, KeyError):
+                continue
+        with self.lock:
+            hints.update({os.path.basename(e.dst): e.species for e in self.entries.values() if e.status == APPLIED})
+        return hints
+
+    def _journal_hints(self, path):
+        # Another reviewer's journal is only parsed again once it has grown
+        st = os.stat(path)
+        cached = self.journal_hints.get(path)
+        if cached is not None and cached[0] == (st.st_size, st.st_mtime_ns):
+            return cached[1]
+        decided, hints = {}, {}
+        for record in read_records(path):
+            if record.get("op") == "decide":
+                decided[record.get("id")] = record
+            elif record.get("op") == "applied" and record.get("id") in decided:
+                record = decided[record["id"]]
+                hints[os.path.basename(record["dst"])] = record.get("species", "")
+        self.journal_hints[path] = ((st.st_size, st.st_mtime_ns), hints)
+        return hints
+
+    def pending_sources(self):
+        with self.lock:
+            return {self._abs(e.src) for e in self.pending.values()}
+
+    def close(self, timeout=5.0):
+        self.stop_event.set()
+        self.worker.join(timeout)
+        super().close()
+        self.lock_file.close()
@@ -0,0 +1,164 @@
+import os
+import hashlib
+import functools
+import tempfile
+import threading
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'bird_sound_examiner_cache')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+# Bytes of the file hashed into its cache key: the header and the start of the audio
+KEY_BLOCK_BYTES = 64 * 1024
+
+
+def clip_cache_key(path):
+    # Keyed on the file's content rather than its path so an entry survives
+    # process_decision moving the clip into filtered_species_files/noise/false_positive
+    # (shutil.move keeps size and mtime). The name alone is not enough:
+    # detectors give clips in different species folders the same names, and
+    # equal-length clips all have the same size.
+    st = os.stat(path)
+    return _content_key(path, st.st_size, st.st_mtime_ns)
+
+
+# A clip is looked up and stored several times per load; only read it once
+@functools.lru_cache(maxsize=4096)
+def _content_key(path, size, mtime_ns):
+    digest = hashlib.sha1(f"{os.path.basename(path)}|{size}|{mtime_ns}|".encode('utf-8'))
+    with open(path, 'rb') as f:
+        digest.update(f.read(KEY_BLOCK_BYTES))
+    return digest.hexdigest()
+
+
+class SpectrogramCache:
+    # max_bytes=None disables eviction (used for precomputed caches)
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, store_pcm=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.store_pcm = store_pcm
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Only needed for eviction; a precomputed cache on a share is never scanned
+        self.total_bytes = sum(size for _, _, size in self._entries()) if max_bytes is not None else 0
+
+    def _entry_path(self, key, kind):
+        return os.path.join(self.cache_dir, f"{key}.{kind}.npy")
+
+    def _entries(self):
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.npy'):
+                    st = entry.stat()
+                    yield entry.path, st.st_mtime, st.st_size
+
+    def _load(self, key, kind):
+        entry_path = self._entry_path(key, kind)
+        try:
+            data = np.load(entry_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if self.max_bytes is not None:
+            try:
+                # Bump mtime so eviction sees this entry as recently used
+                os.utime(entry_path)
+            except OSError:
+                pass
+        return data
+
+    def _store(self, key, kind, array):
+        entry_path = self._entry_path(key, kind)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            try:
+                replaced = os.path.getsize(entry_path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self.lock:
+            # A rewritten entry only adds the difference
+            self.total_bytes += os.path.getsize(entry_path) - replaced
+            if self.max_bytes is not None and self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        # Trim to 90% of the budget so we don't evict again on the very next store
+        target = self.max_bytes * 0.9
+        for entry_path, _, size in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(entry_path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+    def get_spectrogram(self, path):
+        try:
+            return self._load(clip_cache_key(path), 'db')
+        except OSError:
+            return None
+
+    def put_spectrogram(self, path, S_db):
+        self._store(clip_cache_key(path), 'db', S_db.astype(np.float32, copy=False))
+
+    def get_pcm(self, path):
+        if not self.store_pcm:
+            return None
+        try:
+            return self._load(clip_cache_key(path), 'pcm')
+        except OSError:
+            return None
+
+    def put_pcm(self, path, y):
+        if self.store_pcm:
+            self._store(clip_cache_key(path), 'pcm', y)
+
+    def clear(self):
+        with self.lock:
+            for entry_path, _, _ in list(self._entries()):
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            self.total_bytes = 0
+
+
+# A precomputed cache (on the share, never evicted) in front of the local
+# budgeted one: entries are read from either, new ones only go to the local
+# cache, so reviewing never grows the share's cache past what precompute wrote.
+class LayeredCache:
+    def __init__(self, precomputed, local=None):
+        self.precomputed = precomputed
+        self.local = local
+
+    def get_spectrogram(self, path):
+        S_db = self.precomputed.get_spectrogram(path)
+        if S_db is None and self.local is not None:
+            S_db = self.local.get_spectrogram(path)
+        return S_db
+
+    def put_spectrogram(self, path, S_db):
+        if self.local is not None:
+            self.local.put_spectrogram(path, S_db)
+
+    def get_pcm(self, path):
+        y = self.precomputed.get_pcm(path)
+        if y is None and self.local is not None:
+            y = self.local.get_pcm(path)
+        return y
+
+    def put_pcm(self, path, y):
+        if self.local is not None:
+            self.local.put_pcm(path, y)
@@ -0,0 +1,132 @@
+import numpy as np
+
+from spectrogram_renderer import crop_to_max_freq, MAX_DISPLAY_FREQ, TEXT_COLOR
+
+
+PAGE_WIDTH = 1200
+PAGE_HEIGHT = 600
+GAP = 4
+SELECTED_COLOR = (243, 196, 15, 255)
+DECIDED_SHADE = 0.3
+BACKGROUND_COLOR = (52, 73, 94, 255)
+
+
+def tile_size(rows, cols, width=PAGE_WIDTH, height=PAGE_HEIGHT, gap=GAP):
+    return (height - gap * (rows + 1)) // rows, (width - gap * (cols + 1)) // cols
+
+
+def thumbnail(S_db, sr, height, width, max_freq=MAX_DISPLAY_FREQ):
+    # Nearest-neighbour sampling of the displayed band, scaled to [0, 1] per clip.
+    # Cost depends on the tile size only, not on the clip's length.
+    cropped, _ = crop_to_max_freq(S_db, sr, max_freq)
+    rows = np.linspace(cropped.shape[0] - 1, 0, height).round().astype(np.intp)
+    cols = np.linspace(0, cropped.shape[1] - 1, width).round().astype(np.intp)
+    tile = np.asarray(cropped[np.ix_(rows, cols)], dtype=np.float32)
+    low, high = float(tile.min()), float(tile.max())
+    if high > low:
+        tile -= low
+        tile /= high - low
+    else:
+        tile.fill(0)
+    return tile
+
+
+# A page of N x M spectrogram thumbnails drawn as one RGBA image of fixed size,
+# so a page costs one set_data and one blit however many tiles it has. Tiles
+# are composited into a float buffer and colour-mapped once; selection borders
+# and the shading of decided tiles are painted into the same pixels. uint8 RGBA
+# with interpolation='none' lets Agg skip matplotlib's own colour conversion.
+class GridRenderer:
+    def __init__(self, fig, ax, canvas, rows=4, cols=6, cmap='viridis'):
+        import matplotlib
+
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.cmap = matplotlib.colormaps[cmap]
+        self.background = None
+        self.values = None
+        self.rgba = None
+        self.tiles = 0
+        self.set_shape(rows, cols)
+
+        ax.set_axis_off()
+        ax.set_position([0, 0, 1, 0.93])
+        self.image = ax.imshow(self.blank(), origin='upper', aspect='auto', interpolation='none', animated=True)
+        self.title = ax.set_title('', color=TEXT_COLOR, animated=True)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    @staticmethod
+    def blank():
+        page = np.empty((PAGE_HEIGHT, PAGE_WIDTH, 4), dtype=np.uint8)
+        page[:] = BACKGROUND_COLOR
+        return page
+
+    def set_shape(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.tile_height, self.tile_width = tile_size(rows, cols)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.fig.draw_artist(self.image)
+        self.fig.draw_artist(self.title)
+
+    def tile_origin(self, index):
+        row, col = divmod(index, self.cols)
+        return GAP + row * (self.tile_height + GAP), GAP + col * (self.tile_width + GAP)
+
+    def tile_at(self, x, y):
+        # Data coordinates of the page image -> tile index, or None in a gap
+        if x is None or y is None:
+            return None
+        col, x_in = divmod(int(x) - GAP, self.tile_width + GAP)
+        row, y_in = divmod(int(y) - GAP, self.tile_height + GAP)
+        if not (0 <= row < self.rows and 0 <= col < self.cols) or x_in >= self.tile_width or y_in >= self.tile_height:
+            return None
+        index = row * self.cols + col
+        return index if index < self.tiles else None
+
+    def set_page(self, spectrograms):
+        # spectrograms: list of (S_db, sr), at most rows * cols of them
+        self.tiles = len(spectrograms)
+        self.values = np.full((PAGE_HEIGHT, PAGE_WIDTH), np.nan, dtype=np.float32)
+        for index, (S_db, sr) in enumerate(spectrograms):
+            top, left = self.tile_origin(index)
+            self.values[top:top + self.tile_height, left:left + self.tile_width] = \
+                thumbnail(S_db, sr, self.tile_height, self.tile_width)
+        rgba = self.cmap(np.nan_to_num(self.values), bytes=True)
+        rgba[np.isnan(self.values)] = BACKGROUND_COLOR
+        self.rgba = rgba
+
+    def show(self, selected=(), decided=(), title=''):
+        if self.rgba is None:
+            return
+        frame = self.rgba.copy()
+        for index in decided:
+            top, left = self.tile_origin(index)
+            tile = frame[top:top + self.tile_height, left:left + self.tile_width, :3]
+            tile[:] = tile * DECIDED_SHADE
+        for index in selected:
+            top, left = self.tile_origin(index)
+            bottom, right = top + self.tile_height, left + self.tile_width
+            frame[max(top - GAP, 0):top, max(left - GAP, 0):right + GAP] = SELECTED_COLOR
+            frame[bottom:bottom + GAP, max(left - GAP, 0):right + GAP] = SELECTED_COLOR
+            frame[top:bottom, max(left - GAP, 0):left] = SELECTED_COLOR
+            frame[top:bottom, right:right + GAP] = SELECTED_COLOR
+        self.image.set_data(frame)
+        self.title.set_text(title)
+        if self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.fig.draw_artist(self.image)
+            self.fig.draw_artist(self.title)
+            self.canvas.blit(self.fig.bbox)
+
+    def clear(self):
+        self.rgba = None
+        self.tiles = 0
+        self.image.set_data(self.blank())
+        self.title.set_text('')
+        self.canvas.draw_idle()
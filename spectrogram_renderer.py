@@ -0,0 +1,71 @@
+import numpy as np
+
+
+MAX_DISPLAY_FREQ = 15000
+HOP_LENGTH = 512
+TEXT_COLOR = '#ECF0F1'
+
+
+def crop_to_max_freq(S_db, sr, max_freq=MAX_DISPLAY_FREQ):
+    n_fft = 2 * (S_db.shape[0] - 1)
+    bin_hz = sr / n_fft
+    n_rows = min(S_db.shape[0], int(max_freq // bin_hz) + 1)
+    return S_db[:n_rows], n_rows * bin_hz
+
+
+# The image and title are animated artists: a full draw renders only the static
+# decorations (ticks, labels, spines), which are cached as the background. Each
+# new clip restores that background, redraws the two artists and blits.
+class SpectrogramRenderer:
+    def __init__(self, fig, ax, canvas, cmap='viridis', hop_length=HOP_LENGTH, max_freq=MAX_DISPLAY_FREQ):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.hop_length = hop_length
+        self.max_freq = max_freq
+        self.extent = None
+        self.background = None
+
+        self.image = ax.imshow(np.zeros((2, 2), dtype=np.float32), origin='lower', aspect='auto',
+                               interpolation='nearest', cmap=cmap, animated=True, visible=False)
+        self.title = ax.set_title('', color=TEXT_COLOR, animated=True)
+        ax.set_xlabel('Time', color=TEXT_COLOR)
+        ax.set_ylabel('Frequency', color=TEXT_COLOR)
+        ax.tick_params(colors=TEXT_COLOR)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        self.fig.draw_artist(self.image)
+        self.fig.draw_artist(self.title)
+
+    def show(self, S_db, sr, title=''):
+        cropped, top_freq = crop_to_max_freq(S_db, sr, self.max_freq)
+        duration = S_db.shape[1] * self.hop_length / sr
+        extent = (0, duration, 0, top_freq)
+
+        self.image.set_data(cropped)
+        self.image.set_clim(float(np.min(cropped)), float(np.max(cropped)))
+        self.image.set_visible(True)
+        self.title.set_text(title)
+
+        if extent != self.extent or self.background is None:
+            # Axis limits change only when the sample rate or length does
+            self.extent = extent
+            self.image.set_extent(extent)
+            self.ax.set_xlim(0, duration)
+            self.ax.set_ylim(0, top_freq)
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_animated()
+            self.canvas.blit(self.fig.bbox)
+
+    def clear(self):
+        self.image.set_visible(False)
+        self.title.set_text('')
+        self.extent = None
+        self.canvas.draw_idle()
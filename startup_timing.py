@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import time
+import tempfile
+
+
+STARTUP_LOG_FILE = os.path.join(tempfile.gettempdir(), 'bird_sound_examiner_startup.jsonl')
+
+
+class StartupTimer:
+    # Milestones are seconds since `start`; the app passes the perf_counter value
+    # taken on the first line of bird_sounds_filter_app.py.
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.milestones = {}
+
+    def mark(self, name):
+        if name not in self.milestones:
+            self.milestones[name] = round(time.perf_counter() - self.start, 4)
+        return self.milestones[name]
+
+    def summary(self):
+        return ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.milestones.items())
+
+    def record(self, path=STARTUP_LOG_FILE):
+        # One JSON line per launch so regressions show up across builds
+        entry = {"time": time.time(), "frozen": bool(getattr(sys, 'frozen', False)),
+                 "python": sys.version.split()[0], "milestones": self.milestones}
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass
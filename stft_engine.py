@@ -0,0 +1,89 @@
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+N_FFT = 2048
+HOP_LENGTH = 512
+AMIN = 1e-5
+TOP_DB = 80.0
+
+
+def hann_window(n_fft):
+    # Periodic Hann, same as scipy.signal.get_window('hann', n_fft) which librosa uses
+    n = np.arange(n_fft, dtype=np.float64)
+    return (0.5 - 0.5 * np.cos(2.0 * np.pi * n / n_fft)).astype(np.float32)
+
+
+# Computes librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max) for many
+# equal-length clips at once: the clips are stacked into one 2-D array, framed
+# with a strided view and transformed by a single rfft call. The window and the
+# frame buffer are kept between calls. Not thread-safe; use one engine per thread.
+class BatchSpectrogramEngine:
+    def __init__(self, n_fft=N_FFT, hop_length=HOP_LENGTH, top_db=TOP_DB, fft_workers=1):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.top_db = top_db
+        self.fft_workers = fft_workers
+        self.window = hann_window(n_fft)
+        self.padded = None
+        self.frames = None
+
+    def n_frames(self, n_samples):
+        return 1 + n_samples // self.hop_length
+
+    def _buffers(self, batch, n_samples):
+        pad = self.n_fft // 2
+        padded_shape = (batch, n_samples + 2 * pad)
+        if self.padded is None or self.padded.shape != padded_shape:
+            # center=True with librosa's default zero padding
+            self.padded = np.zeros(padded_shape, dtype=np.float32)
+            self.frames = np.empty((batch, self.n_frames(n_samples), self.n_fft), dtype=np.float32)
+        return self.padded, self.frames
+
+    def magnitude(self, batch_y):
+        batch_y = np.asarray(batch_y, dtype=np.float32)
+        batch, n_samples = batch_y.shape
+        pad = self.n_fft // 2
+        padded, frames = self._buffers(batch, n_samples)
+        padded[:, pad:pad + n_samples] = batch_y
+        view = sliding_window_view(padded, self.n_fft, axis=-1)[:, ::self.hop_length]
+        np.multiply(view, self.window, out=frames)
+        # scipy's pocketfft keeps float32 as complex64 and is several times faster
+        # than numpy.fft on batched input
+        spectrum = scipy.fft.rfft(frames, axis=-1, workers=self.fft_workers)
+        # Stays (batch, frames, freq) so the dB pass runs over contiguous memory
+        return np.abs(spectrum)
+
+    def amplitude_to_db(self, S):
+        # Per-clip ref=np.max, as in librosa.amplitude_to_db(S, ref=np.max)
+        ref = np.max(S, axis=(1, 2), keepdims=True)
+        S_db = np.maximum(S, AMIN)
+        np.log10(S_db, out=S_db)
+        S_db *= 20.0
+        S_db -= 20.0 * np.log10(np.maximum(ref, AMIN))
+        if self.top_db is not None:
+            np.maximum(S_db, S_db.max(axis=(1, 2), keepdims=True) - self.top_db, out=S_db)
+        return S_db
+
+    def spectrogram_db(self, batch_y):
+        # (batch, frames, freq) -> (batch, freq, frames) to match librosa's layout
+        return self.amplitude_to_db(self.magnitude(batch_y)).transpose(0, 2, 1)
+
+    def spectrogram_db_many(self, clips, fallback=None):
+        # Stack clips that share a length; anything that isn't a 1-D signal goes
+        # through `fallback` one at a time.
+        results = [None] * len(clips)
+        groups = {}
+        for i, y in enumerate(clips):
+            if np.ndim(y) == 1 and len(y) > 0:
+                groups.setdefault(len(y), []).append(i)
+            elif fallback is not None:
+                results[i] = fallback(y)
+            else:
+                raise ValueError(f"Expected a non-empty 1-D signal, got shape {np.shape(y)}")
+        for indices in groups.values():
+            S_db = self.spectrogram_db(np.stack([clips[i] for i in indices]))
+            for j, i in enumerate(indices):
+                results[i] = S_db[j]
+        return results
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_output import AudioPlayer
+
+
+# Stands in for sounddevice.OutputStream: nothing is played, and the test
+# drives the callback by hand the way PortAudio would from its audio thread
+class FakeStream:
+    def __init__(self, samplerate, callback, blocksize):
+        self.samplerate = samplerate
+        self.callback = callback
+        self.blocksize = blocksize
+        self.active = False
+        self.closed = False
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+        self.closed = True
+
+    def pull(self, frames=None):
+        frames = frames or self.blocksize
+        outdata = np.full((frames, 1), np.nan, dtype=np.float32)
+        self.callback(outdata, frames, None, None)
+        return outdata[:, 0].copy()
+
+
+@pytest.fixture
+def player():
+    streams = []
+
+    def factory(samplerate, callback, blocksize):
+        streams.append(FakeStream(samplerate, callback, blocksize))
+        return streams[-1]
+
+    player = AudioPlayer(blocksize=4, stream_factory=factory)
+    player.streams = streams
+    yield player
+    player.close()
+
+
+def ramp(n, offset=0.0):
+    return (np.arange(n, dtype=np.float32) + offset) / 100.0
+
+
+def test_silence_after_stop(player):
+    player.play("a", ramp(8), 22050)
+    player.stop()
+    assert np.array_equal(player.streams[0].pull(), np.zeros(4, dtype=np.float32))
+
+
+def test_next_clip_is_a_buffer_swap_on_the_same_stream(player):
+    player.play("a", ramp(8), 22050)
+    stream = player.streams[0]
+    assert np.array_equal(stream.pull(), ramp(8)[:4])
+
+    player.play("b", ramp(8, offset=50), 22050)
+    assert np.array_equal(stream.pull(), ramp(8, offset=50)[:4])
+    assert np.array_equal(stream.pull(), ramp(8, offset=50)[4:])
+    # Past the end of the clip the device gets silence, not stale samples
+    assert np.array_equal(stream.pull(), np.zeros(4, dtype=np.float32))
+    assert len(player.streams) == 1 and stream.active
+
+
+def test_short_tail_is_zero_padded(player):
+    player.play("a", ramp(6), 22050)
+    stream = player.streams[0]
+    stream.pull()
+    assert np.array_equal(stream.pull(), np.concatenate([ramp(6)[4:], np.zeros(2, dtype=np.float32)]))
+
+
+def test_replay_rewinds_the_buffer_in_memory(player):
+    player.play("a", ramp(8), 22050)
+    stream = player.streams[0]
+    stream.pull()
+    stream.pull()
+    assert player.replay("a")
+    assert np.array_equal(stream.pull(), ramp(8)[:4])
+    # Only the clip currently loaded can be replayed
+    assert not player.replay("b")
+
+
+def test_preloaded_clip_is_downmixed_and_resampled_to_the_stream_rate(player):
+    player.play("a", ramp(8), 22050)
+    stream = player.streams[0]
+    sr = 44100
+    t = np.arange(sr // 10) / sr
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    player.preload("b", np.stack([tone, tone], axis=1), sr)
+    player.ring["b"].result(timeout=30)
+
+    player.play("b", None, sr)
+    assert stream.samplerate == 22050
+    assert len(player.current) == pytest.approx(len(tone) / 2, abs=2)
+    assert player.current.dtype == np.float32
+    # Still a 440 Hz tone at the stream rate
+    spectrum = np.abs(np.fft.rfft(player.current))
+    peak = np.fft.rfftfreq(len(player.current), 1 / 22050)[np.argmax(spectrum)]
+    assert peak == pytest.approx(440, abs=20)
+
+
+def test_clip_played_without_preload_is_resampled_too(player):
+    player.play("a", ramp(8), 22050)
+    player.play("b", np.zeros(4410, dtype=np.float32), 44100)
+    assert len(player.current) == pytest.approx(2205, abs=2)
+
+
+def test_latency_runs_from_play_to_first_callback(player):
+    player.play("a", ramp(8), 22050)
+    stream = player.streams[0]
+    time.sleep(0.02)
+    stream.pull()
+    # Later callbacks for the same clip are not playback starts
+    stream.pull()
+    player.replay("a")
+    stream.pull()
+
+    stats = player.latency_stats()
+    assert stats["count"] == 2
+    assert stats["max"] >= 0.02
+    assert stats["p50"] <= stats["p95"] <= stats["max"]
+
+
+def test_a_closed_device_is_reopened_on_the_next_play(player):
+    player.play("a", ramp(8), 22050)
+    # e.g. headphones unplugged
+    player.streams[0].active = False
+    player.play("b", ramp(8), 22050)
+    assert len(player.streams) == 2
+    assert player.streams[0].closed
+    assert player.streams[1].samplerate == 22050
+    assert np.array_equal(player.streams[1].pull(), ramp(8)[:4])
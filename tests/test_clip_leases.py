@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import shutil
+import multiprocessing
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from clip_leases import ClipLeases
+from folder_catalog import FILTERED_SPECIES_FOLDER, NOISE_FOLDER
+
+SPECIES = "species_00"
+
+
+def make_folder(main_folder, clips):
+    for folder in (SPECIES, os.path.join(FILTERED_SPECIES_FOLDER, SPECIES), NOISE_FOLDER):
+        os.makedirs(os.path.join(main_folder, folder), exist_ok=True)
+    names = [f"clip_{i:05d}.wav" for i in range(clips)]
+    for name in names:
+        open(os.path.join(main_folder, SPECIES, name), 'wb').close()
+    return names
+
+
+def approve(main_folder, name):
+    shutil.move(os.path.join(main_folder, SPECIES, name),
+                os.path.join(main_folder, FILTERED_SPECIES_FOLDER, SPECIES, name))
+
+
+@pytest.fixture
+def main_folder(tmp_path):
+    return str(tmp_path)
+
+
+def test_approvals_without_a_slot_count_against_the_quota(main_folder):
+    names = make_folder(main_folder, 20)
+    leases = ClipLeases(main_folder)
+    for name in names[:5]:
+        assert leases.reserve_approval(SPECIES, name, 10)
+        approve(main_folder, name)
+    # Approved while not in shared review: no slot files
+    for name in names[5:10]:
+        approve(main_folder, name)
+
+    other = ClipLeases(main_folder)
+    assert other.approved_count(SPECIES) == 10
+    assert not other.reserve_approval(SPECIES, names[10], 10)
+    assert other.reserve_approval(SPECIES, names[10], 11)
+    assert not other.reserve_approval(SPECIES, names[11], 11)
+
+
+def test_a_released_slot_can_be_reserved_again(main_folder):
+    names = make_folder(main_folder, 3)
+    leases = ClipLeases(main_folder)
+    assert leases.reserve_approval(SPECIES, names[0], 1)
+    assert not leases.reserve_approval(SPECIES, names[1], 1)
+    leases.release_approval(SPECIES, names[0])
+    assert leases.reserve_approval(SPECIES, names[1], 1)
+
+
+def expire(leases, name, seconds_ago):
+    lease_path = leases.held[(SPECIES, name)]
+    old = time.time() - seconds_ago
+    os.utime(lease_path, (old, old))
+    return lease_path
+
+
+def test_a_live_lease_is_not_taken_over(main_folder):
+    names = make_folder(main_folder, 2)
+    first = ClipLeases(main_folder, lease_seconds=60)
+    assert first.claim(SPECIES, names)[0] == names
+    second = ClipLeases(main_folder, lease_seconds=60)
+    assert second.claim(SPECIES, names) == ([], [])
+
+
+def test_an_expired_lease_is_taken_over_once(main_folder):
+    names = make_folder(main_folder, 1)
+    crashed = ClipLeases(main_folder, lease_seconds=60)
+    crashed.claim(SPECIES, names)
+    expire(crashed, names[0], 120)
+
+    second = ClipLeases(main_folder, lease_seconds=60)
+    third = ClipLeases(main_folder, lease_seconds=60)
+    assert second.claim(SPECIES, names)[0] == names
+    # The fresh lease is live, so nobody else can take it
+    assert third.claim(SPECIES, names) == ([], [])
+
+
+def test_a_lease_renewed_after_it_was_seen_expiring_is_kept(main_folder):
+    names = make_folder(main_folder, 1)
+    slow = ClipLeases(main_folder, lease_seconds=60)
+    slow.claim(SPECIES, names)
+    lease_path = expire(slow, names[0], 120)
+    with open(lease_path, 'rb') as f:
+        content = f.read()
+    seen_mtime_ns = os.stat(lease_path).st_mtime_ns
+    # Its reviewer was only suspended and renews before the takeover
+    slow.heartbeat(force=True)
+
+    other = ClipLeases(main_folder, lease_seconds=60)
+    assert not other._take_over(lease_path, content, seen_mtime_ns)
+    assert os.path.exists(lease_path)
+
+
+def test_a_lease_generation_is_taken_over_by_one_reviewer_only(main_folder):
+    names = make_folder(main_folder, 1)
+    crashed = ClipLeases(main_folder, lease_seconds=60)
+    crashed.claim(SPECIES, names)
+    lease_path = expire(crashed, names[0], 120)
+    with open(lease_path, 'rb') as f:
+        content = f.read()
+    mtime_ns = os.stat(lease_path).st_mtime_ns
+
+    first, second = ClipLeases(main_folder, lease_seconds=60), ClipLeases(main_folder, lease_seconds=60)
+    assert first._take_over(lease_path, content, mtime_ns)
+    # A reviewer that saw the same expired lease must not delete whatever is there now
+    assert not second._take_over(lease_path, content, mtime_ns)
+
+
+def reviewer(main_folder, max_approved, lease_seconds, crash, results):
+    # Every other clip is approved until the shared quota runs out, the rest go
+    # to noise. A "crashing" reviewer claims one batch and exits without
+    # releasing it, like a killed client.
+    leases = ClipLeases(main_folder, lease_seconds=lease_seconds, batch_size=5)
+    species_folder = os.path.join(main_folder, SPECIES)
+    reviewed, approved = [], []
+    while True:
+        names = sorted(os.listdir(species_folder))
+        claimed, _ = leases.claim(SPECIES, names)
+        if crash:
+            results.put((leases.reviewer, claimed, [], True))
+            # Flush the queue's feeder thread, then die without any cleanup
+            results.close()
+            results.join_thread()
+            os._exit(0)
+        if not claimed:
+            # Leases of a crashed reviewer free up after lease_seconds
+            if names:
+                time.sleep(lease_seconds / 4)
+                continue
+            break
+        for name in claimed:
+            if len(reviewed) % 2 == 0 and leases.reserve_approval(SPECIES, name, max_approved):
+                approve(main_folder, name)
+                approved.append(name)
+            else:
+                shutil.move(os.path.join(species_folder, name), os.path.join(main_folder, NOISE_FOLDER, name))
+            leases.complete(SPECIES, name)
+            reviewed.append(name)
+        leases.heartbeat(force=True)
+    leases.close()
+    results.put((leases.reviewer, reviewed, approved, False))
+
+
+def test_reviewer_processes_split_the_folder(main_folder):
+    # Several local processes, one of which crashes holding leases
+    clips, reviewers, max_approved, lease_seconds = 60, 3, 10, 1.0
+    make_folder(main_folder, clips)
+    results = multiprocessing.Queue()
+    crashed = multiprocessing.Process(target=reviewer, args=(main_folder, max_approved, lease_seconds, True, results))
+    crashed.start()
+    crashed.join()
+    processes = [multiprocessing.Process(target=reviewer, args=(main_folder, max_approved, lease_seconds, False, results))
+                 for _ in range(reviewers)]
+    for p in processes:
+        p.start()
+    # A reviewer that dies on an exception never reports; don't wait forever
+    outcomes = [results.get(timeout=60) for _ in range(reviewers + 1)]
+    for p in processes:
+        p.join()
+
+    reviewed = [name for _, names, _, crash in outcomes if not crash for name in names]
+    approved = [name for _, _, names, _ in outcomes for name in names]
+    abandoned = [name for _, names, _, crash in outcomes if crash for name in names]
+    assert abandoned
+    assert sorted(reviewed) == sorted(set(reviewed))
+    assert len(reviewed) == clips
+    approved_on_disk = os.listdir(os.path.join(main_folder, FILTERED_SPECIES_FOLDER, SPECIES))
+    assert len(approved_on_disk) == len(approved) == max_approved
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from audio_decode import decode_mono
+from clip_loader import compute_spectrogram_db_batch
+from spectrogram_renderer import MAX_DISPLAY_FREQ
+
+
+BIRD_BAND = (1000.0, 10000.0)
+SNR_SCALE_DB = 20.0
+
+
+# Cheap per-clip features from dB spectrograms stacked as (batch, freq, frames):
+#   band_ratio - share of the energy inside BIRD_BAND
+#   flatness   - 10th-percentile spectral flatness of the band's frames, so a
+#                short tonal call pulls it down (1.0 = white noise throughout)
+#   snr_db     - loudest frames (p95) against the typical frame (median), over
+#                the whole displayed band so owls, doves or bitterns calling
+#                below BIRD_BAND still count as a transient
+def clip_features(S_db_batch, sr):
+    S_db_batch = np.asarray(S_db_batch, dtype=np.float32)
+    n_fft = 2 * (S_db_batch.shape[1] - 1)
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    band = (freqs >= BIRD_BAND[0]) & (freqs <= BIRD_BAND[1])
+    displayed = freqs <= MAX_DISPLAY_FREQ
+
+    power = np.power(10.0, S_db_batch / 10.0, dtype=np.float32)
+    band_power = power[:, band, :]
+    total = power.sum(axis=(1, 2))
+    band_ratio = band_power.sum(axis=(1, 2)) / np.maximum(total, 1e-12)
+
+    log_mean = np.log(np.maximum(band_power, 1e-12)).mean(axis=1)
+    flatness = np.percentile(np.exp(log_mean) / np.maximum(band_power.mean(axis=1), 1e-12), 10, axis=1)
+
+    frame_energy = power[:, displayed, :].sum(axis=1)
+    snr_db = 10.0 * np.log10(np.maximum(np.percentile(frame_energy, 95, axis=1), 1e-12)
+                             / np.maximum(np.median(frame_energy, axis=1), 1e-12))
+    return {"band_ratio": band_ratio, "flatness": flatness, "snr_db": snr_db}
+
+
+def triage_scores(features):
+    # Heuristic bird-likeness in [0, 1]; noise confidence is its complement. A
+    # clip with no transient above the background scores near 0 whatever its
+    # spectrum looks like, so steady noise gets a confidence close to 1.
+    score = (np.clip(features["snr_db"] / SNR_SCALE_DB, 0.0, 1.0)
+             * (0.5 + 0.5 * np.clip(features["band_ratio"], 0.0, 1.0))
+             * (1.0 - 0.5 * np.clip(features["flatness"], 0.0, 1.0)))
+    return score, 1.0 - score
+
+
+def _score_chunk(paths, cache):
+    spectrograms = {}
+    to_compute = []
+    for path in paths:
+        try:
+            sr = sf.info(path).samplerate
+            S_db = cache.get_spectrogram(path) if cache is not None else None
+            if S_db is None:
+                y, sr = decode_mono(path)
+                to_compute.append((path, sr, y))
+            else:
+                spectrograms[path] = (sr, S_db)
+        except Exception:
+            continue
+    for (path, sr, _), S_db in zip(to_compute, compute_spectrogram_db_batch([y for _, _, y in to_compute])):
+        if cache is not None:
+            cache.put_spectrogram(path, S_db)
+        spectrograms[path] = (sr, S_db)
+
+    # Features are computed per group of identically shaped spectrograms
+    groups = {}
+    for path, (sr, S_db) in spectrograms.items():
+        groups.setdefault((sr, S_db.shape), []).append(path)
+    results = {}
+    for (sr, _), group in groups.items():
+        score, noise_confidence = triage_scores(clip_features(np.stack([spectrograms[p][1] for p in group]), sr))
+        for path, s, n in zip(group, score, noise_confidence):
+            results[path] = (float(s), float(n))
+    return results
+
+
+def score_clips(paths, cache=None, chunk_size=16, max_workers=4):
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clip-triage") as executor:
+        for chunk_results in executor.map(_score_chunk, chunks, [cache] * len(chunks)):
+            results.update(chunk_results)
+    return results